@@ -1,9 +1,26 @@
 import streamlit as st
 import pandas as pd
-import requests, re
-import xml.etree.ElementTree as ET
+import numpy as np
+import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import requests, re, io, os, tempfile, threading
+from contextlib import nullcontext
+from pathlib import Path
 import folium
-from streamlit_folium import st_folium
+from branca.element import MacroElement, Template
+from folium.plugins import VectorGridProtobuf
+from boundaries import (iter_kml_features, as_geojson, district_bounds,
+                        simplify_levels, zoom_tolerance,
+                        source_hash, read_cache, read_cache_meta, write_cache)
+from tiles import TileArchive, read_archive_meta, write_archive, serve
+from live import ResultsFeed, frame_version
+from history import elections, read_csv_frame, swing, seat_change
+from spatial import ACIndex
+from reconcile import reconcile, read_mapping
+from table import ResultsTable, PAGE_SIZE
+from booths import open_store, booth_summary
+import profiling
+from profiling import cache_data, stage
 
 # ── Page config ───────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -51,6 +68,13 @@ st.markdown("""
 REPO    = "https://raw.githubusercontent.com/somdeepkundu/test_git/master/WestBengal_Assembly_Election_2026"
 CSV_URL = REPO + "/election_data.csv"
 KML_URL = REPO + "/wb_acs_map.kml"
+BOUNDARY_CACHE = Path(__file__).parent / "wb_acs_map.bin"
+AC_MAPPING     = Path(__file__).parent / "ac_mapping.csv"   # reviewable KML ↔ results pairing (python reconcile.py)
+CURRENT_YEAR   = 2026
+STATE          = "WB"
+HISTORY_DIR    = Path(os.environ.get("WB_HISTORY", Path(__file__).parent / "history"))
+BOOTHS_DIR     = Path(os.environ.get("WB_BOOTHS",  Path(__file__).parent / "booths"))
+BOOTH_CACHE    = int(os.environ.get("WB_BOOTH_CACHE", 16))   # ACs of booth rows kept in memory
 
 PARTY_COLORS = {
     "BJP":    "#FF9800",
@@ -69,96 +93,454 @@ PARTY_ABBREV = {
     "All India Secular Front":            "AISF",
     "Aam Janata Unnayan party":           "AJU",
 }
+PARTIES = pd.Index(list(dict.fromkeys([*PARTY_ABBREV.values(), "Other"])))
+
+# Margin bands: (upper bound in votes, name); the last band is open-ended.
+# Labels are derived from the bounds, e.g. "Very Close (1-5K)".
+MARGIN_BANDS = [
+    (1_000,  "Extremely Close"),
+    (5_000,  "Very Close"),
+    (10_000, "Close"),
+    (30_000, "Comfortable"),
+    (None,   "Landslide"),
+]
+def _band_label(lo, hi, name):
+    k    = lambda v: f"{v / 1000:g}"
+    span = f"<{k(hi)}K" if lo is None else f">{k(lo)}K" if hi is None else f"{k(lo)}-{k(hi)}K"
+    return f"{name} ({span})"
+
+MARGIN_EDGES  = np.array([hi for hi, _ in MARGIN_BANDS[:-1]], dtype=float)
+MARGIN_LABELS = [_band_label(lo, hi, name) for lo, (hi, name)
+                 in zip([None, *MARGIN_EDGES], MARGIN_BANDS)] + ["Unknown"]
 WB_BOUNDS = [[85.8, 21.4], [89.9, 27.3]]
 WB_CENTER = [23.4, 87.9]
 MIN_ZOOM, MAX_ZOOM = 7, 12
+LEVEL_ZOOMS = range(MIN_ZOOM, MAX_ZOOM)   # pre-simplified geometry; MAX_ZOOM uses full rings
 
 # ── Session state defaults ────────────────────────────────────────────────────
 if "party_filter" not in st.session_state:
     st.session_state["party_filter"] = "All"
 
 # ── Data loaders ──────────────────────────────────────────────────────────────
-@st.cache_data(show_spinner="Fetching data from GitHub...")
-def load_data():
-    df = pd.read_csv(CSV_URL)
+def prepare_results(df):
+    # Raw CSV rows → app frame; row-wise, so live updates can run it on a subset
     df["Margin"]       = pd.to_numeric(df["Margin"],     errors="coerce")
     df["Const. No."]   = pd.to_numeric(df["Const. No."], errors="coerce")
     df["Constituency"] = df["Constituency"].str.strip()
-    df["Party"]        = df["Leading Party"].map(PARTY_ABBREV).fillna("Other")
-    def mcat(m):
-        if pd.isna(m): return "Unknown"
-        if m <  1000:  return "Extremely Close (<1K)"
-        if m <  5000:  return "Very Close (1-5K)"
-        if m < 10000:  return "Close (5-10K)"
-        if m < 30000:  return "Comfortable (10-30K)"
-        return         "Landslide (>30K)"
-    df["Margin_Cat"] = df["Margin"].apply(mcat)
+    df["Party"]        = party_codes(df["Leading Party"])
+    df["Margin_Cat"]   = margin_bands(df["Margin"])
+    df["Status"]       = df["Status"].astype("category")
     return df
 
-@st.cache_data(show_spinner="Parsing KML boundaries...")
+def party_codes(leading):
+    # Abbreviate each distinct party name once, then broadcast by category code
+    lp    = leading.astype("category")
+    codes = PARTIES.get_indexer(lp.cat.categories.map(PARTY_ABBREV).fillna("Other"))
+    codes = np.append(codes, PARTIES.get_loc("Other"))   # code -1 (missing) → Other
+    return pd.Categorical.from_codes(codes[lp.cat.codes], categories=PARTIES)
+
+def margin_bands(margin):
+    codes = np.searchsorted(MARGIN_EDGES, margin, side="right")
+    codes[np.isnan(margin)] = len(MARGIN_LABELS) - 1
+    return pd.Categorical.from_codes(codes, categories=MARGIN_LABELS, ordered=True)
+
+@cache_data(show_spinner="Fetching data from GitHub...")
+def load_data(src=CSV_URL):
+    df = prepare_results(pd.read_csv(src))
+    df.attrs["version"] = frame_version(df)
+    return df
+
+# Past elections come from the Parquet store in HISTORY_DIR (see history.py);
+# only the columns the dashboard shows are read.
+DISPLAY_COLUMNS = ["Const. No.", "Constituency", "Leading Candidate", "Leading Party",
+                   "Trailing Candidate", "Margin", "Status"]
+
+@cache_data(ttl=300, show_spinner=False)
+def stored_elections():
+    return elections(HISTORY_DIR, STATE)
+
+@cache_data(max_entries=8, show_spinner="Loading election...")
+def load_election(year, election="general"):
+    df = prepare_results(read_csv_frame(HISTORY_DIR, STATE, year, election, DISPLAY_COLUMNS))
+    df.attrs["version"] = frame_version(df)
+    return df
+
+@cache_data(max_entries=16, show_spinner=False)
+def load_swing(base, target):
+    return swing(HISTORY_DIR, STATE, base, target)
+
+# With WB_LIVE_POLL=<seconds> the CSV is polled with conditional requests and
+# changed constituencies are patched into one shared frame (see live.py).
+LIVE_POLL = int(os.environ.get("WB_LIVE_POLL", 0))
+
+@st.cache_resource(show_spinner=False)
+def results_feed():
+    return ResultsFeed(CSV_URL, prepare_results, interval=LIVE_POLL)
+
+def current_results():
+    if not LIVE_POLL:
+        return load_data()
+    feed = results_feed()
+    with st.spinner("Fetching data from GitHub...") if feed.frame is None else nullcontext():
+        feed.poll_if_due()
+    return feed.frame
+
+def _store_boundaries(geojson, **meta):
+    try:
+        write_cache(BOUNDARY_CACHE, geojson, **meta)
+    except OSError:
+        pass  # read-only deployment: keep serving the in-memory copy
+
+@st.cache_resource(show_spinner="Loading constituency boundaries...")
 def load_geojson():
-    r = requests.get(KML_URL, timeout=30)
+    # Boundaries are memory-mapped from BOUNDARY_CACHE; the KML is only parsed
+    # again when its sha256 differs from the one the cache was built from, or
+    # when the cache holds simplified levels for other zooms.
+    meta    = read_cache_meta(BOUNDARY_CACHE)
+    fresh   = meta is not None and meta.get("levels") == list(LEVEL_ZOOMS)
+    headers = {"If-None-Match": meta["etag"]} if fresh and meta.get("etag") else {}
+    try:
+        r = requests.get(KML_URL, timeout=30, headers=headers)
+    except requests.RequestException:
+        if meta is None:
+            raise
+        return read_cache(BOUNDARY_CACHE)
+    if fresh and r.status_code == 304:
+        return read_cache(BOUNDARY_CACHE)
     r.raise_for_status()
-    root = ET.fromstring(r.content)
-    ns = {"kml": "http://www.opengis.net/kml/2.2"}
-    features = []
-    for pm in root.findall(".//kml:Placemark", ns):
-        try:
-            props = {}
-            sd = pm.find(".//kml:SchemaData", ns)
-            if sd is not None:
-                for item in sd.findall(".//kml:SimpleData", ns):
-                    props[item.get("name")] = item.text
-            ce = pm.find(".//kml:coordinates", ns)
-            if ce is None or not ce.text:
-                continue
-            coords = []
-            for c in ce.text.strip().split():
-                p = c.split(",")
-                if len(p) >= 2:
-                    coords.append([float(p[0]), float(p[1])])
-            if len(coords) < 3:
-                continue
-            features.append({
-                "type": "Feature",
-                "properties": props,
-                "geometry": {"type": "Polygon", "coordinates": [coords]},
-            })
-        except Exception:
-            pass
-    return {"type": "FeatureCollection", "features": features}
+
+    digest = source_hash(r.content)
+    etag   = r.headers.get("ETag")
+    if fresh and meta.get("sha256") == digest:
+        if etag and etag != meta.get("etag"):
+            _store_boundaries(read_cache(BOUNDARY_CACHE), sha256=digest, etag=etag)
+        return read_cache(BOUNDARY_CACHE)
+
+    features = list(iter_kml_features(io.BytesIO(r.content)))
+    geojson  = {"type": "FeatureCollection", "features": features, "sha256": digest,
+                "levels": simplify_levels(features, {z: zoom_tolerance(z) for z in LEVEL_ZOOMS})}
+    _store_boundaries(geojson, sha256=digest, etag=etag)
+    return geojson
 
 def clean(s):
     return re.sub(r"\s*\(SC\)|\s*\(ST\)", "", str(s)).strip().upper()
 
-def district_bounds(geojson):
-    bounds = {}
-    for f in geojson["features"]:
-        dist   = f["properties"].get("dist_name", "Unknown")
-        coords = f["geometry"]["coordinates"][0]
-        lons   = [c[0] for c in coords]
-        lats   = [c[1] for c in coords]
-        if dist not in bounds:
-            bounds[dist] = [min(lats), min(lons), max(lats), max(lons)]
-        else:
-            b = bounds[dist]
-            bounds[dist] = [min(b[0],min(lats)), min(b[1],min(lons)),
-                            max(b[2],max(lats)), max(b[3],max(lons))]
-    return {d: [[v[0],v[1]],[v[2],v[3]]] for d,v in bounds.items()}
+def ac_keys(names):
+    # clean() over a whole Series
+    return (names.astype(str).str.replace(r"\s*\(SC\)|\s*\(ST\)", "", regex=True)
+                 .str.strip().str.upper())
+
+@cache_data(show_spinner=False)
+def feature_table(_geojson, version):
+    # One row per boundary feature, in feature order: raw name, join key, district.
+    # ``version`` is the boundary sha256 and stands in for the unhashed collection.
+    props = pd.DataFrame([f["properties"] for f in _geojson["features"]],
+                         columns=["ac_name", "dist_name", "ac_no"])
+    ft = pd.DataFrame({"ac_name":  props["ac_name"].fillna(""),
+                       "AC_Key":   ac_keys(props["ac_name"].fillna("")),
+                       "District": props["dist_name"].fillna("Unknown")})
+    if props["ac_no"].notna().any():
+        ft["ac_no"] = pd.to_numeric(props["ac_no"], errors="coerce")
+    return ft
+
+@cache_data(show_spinner=False, max_entries=8)
+def _join_districts(_df, _geojson, version):
+    # Rows are paired with features by reconcile (AC number, exact name, then
+    # fuzzy name); a paired row takes its feature's AC_Key so build_map finds it.
+    # The mapping file is only read here; reconcile.py's CLI writes it.
+    # Unpaired rows get a "?"-prefixed key that no feature's AC_Key can equal,
+    # so they never shadow a paired row in build_map's lookup.
+    ft     = feature_table(_geojson, version[1])
+    fid, _ = reconcile(ft, _df, read_mapping(AC_MAPPING))
+    paired = fid >= 0
+    out    = _df.copy()
+    out["AC_Key"]   = np.where(paired, ft["AC_Key"].to_numpy()[fid], "?" + ac_keys(out["Constituency"]))
+    out["District"] = pd.Categorical(np.where(paired, ft["District"].to_numpy()[fid], "Unknown"),
+                                     categories=sorted(set(ft["District"]) - {"Unknown"}) + ["Unknown"])
+    return out
+
+@st.cache_resource(show_spinner=False)
+def ac_index(_geojson, version):
+    # point → feature index over the full-resolution boundaries
+    return ACIndex(_geojson)
+
+def mapping_version(path=None):
+    # mtime/size of the AC mapping file, so an edited ac_mapping.csv misses
+    # every cache keyed on data_version
+    try:
+        stat = os.stat(path or AC_MAPPING)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def data_version(df, geojson):
+    return df.attrs.get("version"), geojson.get("sha256"), mapping_version()
+
+def join_districts(df, geojson):
+    # Results plus AC_Key / District columns; every view filters this frame.
+    # Cached on the (results, boundaries, mapping) versions so reruns skip hashing df.
+    return _join_districts(df, geojson, data_version(df, geojson))
+
+# ── Aggregates ────────────────────────────────────────────────────────────────
+# Seat counts, margin totals, closest/biggest AC and margin-band histograms per
+# district (plus "All Districts"), built once per data version.  Widgets read
+# them with dict lookups instead of re-running value_counts / nsmallest.
+def _rollup(df, by):
+    stats = df.groupby(by, observed=True).agg(seats=("Constituency", "size"),
+                                              total_margin=("Margin", "sum"))
+    known = df.dropna(subset=["Margin"])
+    g     = known.groupby(by, observed=True)["Margin"]
+    for name, idx in (("closest", g.idxmin()), ("biggest", g.idxmax())):
+        ext = known.loc[idx.values, [*by, "Constituency", "Margin"]].set_index(by)
+        stats[name] = pd.Series(list(zip(ext["Constituency"], ext["Margin"])), index=ext.index)
+    stats = stats.astype(object).where(stats.notna(), None)
+    return stats.to_dict("index")
+
+@cache_data(max_entries=8, show_spinner=False)
+def _aggregates(_df, version):
+    state = _df.assign(District="All Districts")
+    cube, dists, bands = {}, {}, {}
+    for frame in (_df, state):
+        cube.update(_rollup(frame, ["District", "Party"]))
+        dists.update({k[0] if isinstance(k, tuple) else k: v
+                      for k, v in _rollup(frame, ["District"]).items()})
+        counts = frame.groupby(["District", "Margin_Cat"], observed=True).size()
+        for (d, band), n in counts.items():
+            bands.setdefault(d, {})[band] = int(n)
+    seats = {}
+    for (d, party), v in cube.items():
+        seats.setdefault(d, {})[party] = int(v["seats"])
+    for d in seats:
+        seats[d] = dict(sorted(seats[d].items(), key=lambda kv: -kv[1]))
+    return {"cube": cube, "districts": dists, "seats": seats, "bands": bands}
+
+def aggregates(df, geojson):
+    return _aggregates(df, data_version(df, geojson))
+
+def party_seats(agg, district_filter="All Districts", party_filter="All"):
+    # {party: seats} for a filter combination, largest first
+    seats = agg["seats"].get(district_filter, {})
+    if party_filter == "Others":
+        return {p: n for p, n in seats.items() if p not in ("BJP", "AITC")}
+    if party_filter != "All":
+        return {p: n for p, n in seats.items() if p == party_filter}
+    return seats
+
+# Booth-level results (see booths.py) are read one AC at a time when it is
+# opened; the last BOOTH_CACHE ACs stay cached, older ones are evicted.
+@st.cache_resource(ttl=300, show_spinner=False)
+def booth_store(year, election="general"):
+    return open_store(BOOTHS_DIR, STATE, year, election)
+
+@cache_data(max_entries=BOOTH_CACHE, show_spinner="Loading booths...")
+def load_booths(year, election, ac_no, version):
+    return booth_summary(booth_store(year, election).read(ac_no))
+
+# ── Results table ─────────────────────────────────────────────────────────────
+# One ResultsTable per data version (see table.py); reruns only fetch the page
+# on screen, with sort orders and filter masks reused across interactions.
+TABLE_COLUMNS   = ["Constituency", "Party", "Leading Candidate", "Trailing Candidate",
+                   "Margin", "Margin_Cat", "District", "Status"]
+TABLE_PRESORT   = [("Margin", False)]                    # the table's default sort
+TABLE_PREFILTER = ["District", "Party", "Margin_Cat"]    # the columns table_filters uses
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _results_table(_df, version):
+    return ResultsTable(_df, TABLE_COLUMNS, TABLE_PRESORT, TABLE_PREFILTER)
+
+def results_table(df, geojson):
+    return _results_table(df, data_version(df, geojson))
+
+def table_filters(district_filter="All Districts", party_filter="All", band="All"):
+    return {"District":   None if district_filter == "All Districts" else district_filter,
+            "Party":      {"All": None, "Others": ("not", ("BJP", "AITC"))}.get(party_filter, party_filter),
+            "Margin_Cat": None if band == "All" else band}
 
 # ── Map builder ───────────────────────────────────────────────────────────────
-def build_map(df, geojson, district_filter="All Districts",
-              dist_bbox=None, party_filter="All", legend_df=None):
+DIM_STYLE       = {"fillColor": "#cccccc", "color": "#aaa", "weight": 0.4, "fillOpacity": 0.20}
+HIGHLIGHT_STYLE = {"weight": 2.5, "color": "#000", "fillOpacity": 0.93}
+
+def _ac_color(row, party_filter):
+    # Fill colour for an AC, or None when the party filter dims it
+    if party_filter not in ("All", "Others"):
+        # Single-party filter: dim everything else
+        if row is None or row["Party"] != party_filter:
+            return None
+    elif party_filter == "Others" and row is not None and row["Party"] in ("BJP", "AITC"):
+        # Others filter: dim BJP and AITC
+        return None
+    return PARTY_COLORS.get(row["Party"], "#CCCCCC") if row is not None else "#CCCCCC"
 
-    lookup = {clean(r["Constituency"]): r for _, r in df.iterrows()}
+def _margin_str(row):
+    return f"{int(row['Margin']):,}" if row is not None and pd.notna(row["Margin"]) else "N/A"
 
-    dist_acs = {}
-    for f in geojson["features"]:
-        ac   = f["properties"].get("ac_name", "")
-        dist = f["properties"].get("dist_name", "Unknown")
-        dist_acs.setdefault(dist, set()).add(clean(ac))
+def _popup_html(row, ac_raw, dist, color):
+    if row is None:
+        return "<b>" + ac_raw + "</b><br><i>No election data</i>"
+    margin_str = _margin_str(row)
+    return (
+        "<div style=\"font-family:Arial,sans-serif;font-size:13px;"
+        "line-height:1.75;min-width:230px;max-width:290px\">"
+        "<div style=\"background:" + color + ";color:white;padding:7px 11px;"
+        "border-radius:6px 6px 0 0;font-weight:700;font-size:14px;"
+        "display:flex;justify-content:space-between;align-items:center\">"
+        "<span>" + str(row["Constituency"]) + "</span>"
+        "<span style=\"font-size:11px;opacity:.9\">" + str(row["Party"]) + "</span>"
+        "</div>"
+        "<div style=\"padding:9px 11px;border:1px solid #ddd;"
+        "border-top:none;border-radius:0 0 6px 6px;background:#fff\">"
+        "<div style=\"margin-bottom:6px;color:#888;font-size:11px;font-weight:600;"
+        "letter-spacing:.4px;text-transform:uppercase\">AC No. "
+        + (str(int(row["Const. No."])) if pd.notna(row["Const. No."]) else "—") + "</div>"
+        "<div style=\"margin-bottom:3px\"><b>Winner</b>: " + str(row["Leading Candidate"]).title() + "</div>"
+        "<div style=\"margin-bottom:3px\"><b>Runner-up</b>: " + str(row["Trailing Candidate"]).title() + "</div>"
+        "<div style=\"margin-bottom:3px\"><b>Margin</b>: " + margin_str + " votes</div>"
+        "<div style=\"margin-bottom:3px\"><b>Category</b>: " + str(row["Margin_Cat"]) + "</div>"
+        "<div style=\"margin-bottom:3px\"><b>District</b>: " + dist + "</div>"
+        "<div><b>Status</b>: <span style=\"background:#e8f5e9;color:#2e7d32;"
+        "padding:1px 6px;border-radius:3px;font-size:11px;font-weight:600\">"
+        + str(row["Status"]) + "</span></div>"
+        "</div></div>"
+    )
+
+def _tooltip_text(row, ac_raw):
+    return ac_raw if row is None \
+           else str(row["Constituency"]) + " — " + str(row["Party"]) + " (+" + _margin_str(row) + ")"
+
+def _ac_record(row, ac_raw, dist, color):
+    # Compact per-AC attributes; the popup markup is rebuilt client-side
+    if color is None:
+        return {"n": ac_raw, "dim": 1}
+    if row is None:
+        return {"n": ac_raw, "c": color}
+    return {"n": str(row["Constituency"]), "c": color, "p": str(row["Party"]),
+            "no": str(int(row["Const. No."])) if pd.notna(row["Const. No."]) else "—",
+            "w": str(row["Leading Candidate"]).title(), "r": str(row["Trailing Candidate"]).title(),
+            "m": _margin_str(row), "k": str(row["Margin_Cat"]), "d": dist, "s": str(row["Status"])}
+
+# Client-side _popup_html/_tooltip_text over an _ac_record
+_RESULT_JS = """
+    function wbPopup(r) {
+        if (!r.p) return r.dim ? r.n : "<b>" + r.n + "</b><br><i>No election data</i>";
+        return '<div style="font-family:Arial,sans-serif;font-size:13px;line-height:1.75;min-width:230px;max-width:290px">'
+          + '<div style="background:' + r.c + ';color:white;padding:7px 11px;border-radius:6px 6px 0 0;font-weight:700;font-size:14px;display:flex;justify-content:space-between;align-items:center">'
+          + '<span>' + r.n + '</span><span style="font-size:11px;opacity:.9">' + r.p + '</span></div>'
+          + '<div style="padding:9px 11px;border:1px solid #ddd;border-top:none;border-radius:0 0 6px 6px;background:#fff">'
+          + '<div style="margin-bottom:6px;color:#888;font-size:11px;font-weight:600;letter-spacing:.4px;text-transform:uppercase">AC No. ' + r.no + '</div>'
+          + '<div style="margin-bottom:3px"><b>Winner</b>: ' + r.w + '</div>'
+          + '<div style="margin-bottom:3px"><b>Runner-up</b>: ' + r.r + '</div>'
+          + '<div style="margin-bottom:3px"><b>Margin</b>: ' + r.m + ' votes</div>'
+          + '<div style="margin-bottom:3px"><b>Category</b>: ' + r.k + '</div>'
+          + '<div style="margin-bottom:3px"><b>District</b>: ' + r.d + '</div>'
+          + '<div><b>Status</b>: <span style="background:#e8f5e9;color:#2e7d32;padding:1px 6px;border-radius:3px;font-size:11px;font-weight:600">' + r.s + '</span></div>'
+          + '</div></div>';
+    }
+    function wbTooltip(r) {
+        return r.p ? r.n + " — " + r.p + " (+" + r.m + ")" : r.n;
+    }
+"""
+
+class _GeoJsonResults(MacroElement):
+    # Popups and tooltips for the single-layer GeoJson, built in the browser
+    # from each feature's _ac_record properties.
+    _template = Template("""
+    {% macro script(this, kwargs) %}
+    """ + _RESULT_JS + """
+    {{ this._parent.get_name() }}
+        .bindPopup(function(l) { return wbPopup(l.feature.properties); }, {maxWidth: 300})
+        .bindTooltip(function(l) { return wbTooltip(l.feature.properties); }, {sticky: false});
+    {% endmacro %}
+    """)
 
-    allowed_dist  = dist_acs.get(district_filter) if district_filter != "All Districts" else None
+    def __init__(self):
+        super().__init__()
+        self._name = "GeoJsonResults"
+
+# ── Vector tile mode ──────────────────────────────────────────────────────────
+# With WB_TILE_PORT set, boundaries are served as vector tiles from a local
+# endpoint (put it behind the same proxy as the app and point WB_TILE_URL at
+# the public address) and each rerun only ships the per-AC result attributes.
+TILE_PORT    = int(os.environ.get("WB_TILE_PORT", 0))
+TILE_URL     = os.environ.get("WB_TILE_URL", f"http://localhost:{TILE_PORT}")
+TILE_ARCHIVE = Path(__file__).parent / "wb_acs_map.tiles"
+TILE_LAYER_OPTIONS = """{
+    interactive: true,
+    minZoom: %d, maxNativeZoom: %d,
+    getFeatureId: function(f) { return f.properties.ac; },
+    vectorTileLayerStyles: { acs: function(p) { return wbTileStyle(p.ac); } }
+}""" % (MIN_ZOOM, MAX_ZOOM)
+
+@st.cache_resource(show_spinner="Cutting vector tiles...")
+def tile_server():
+    geojson = load_geojson()
+    path    = TILE_ARCHIVE
+    meta    = read_archive_meta(path)
+    if meta is None or meta.get("source") != geojson.get("sha256"):
+        try:
+            write_archive(path, geojson, range(MIN_ZOOM, MAX_ZOOM + 1), source=geojson.get("sha256"))
+        except OSError:
+            path = Path(tempfile.gettempdir()) / TILE_ARCHIVE.name
+            write_archive(path, geojson, range(MIN_ZOOM, MAX_ZOOM + 1), source=geojson.get("sha256"))
+    archive = TileArchive(path)
+    serve(archive, TILE_PORT)
+    return f"{TILE_URL}/tiles/{archive.version}/{{z}}/{{x}}/{{y}}.pbf"
+
+class _TileResults(MacroElement):
+    # Styles, tooltips and popups for the parent VectorGrid layer, driven by
+    # the per-AC attribute table.
+    _template = Template("""
+    {% macro script(this, kwargs) %}
+    var {{ this.get_name() }} = {{ this.results|tojson }};
+    function wbTileStyle(ac) {
+        var r = {{ this.get_name() }}[ac];
+        if (!r) return {stroke: false, fill: false};
+        if (r.dim) return Object.assign({fill: true}, {{ this.dim|tojson }});
+        return {fill: true, fillColor: r.c, color: "#555", weight: 0.7, fillOpacity: 0.78};
+    }
+    """ + _RESULT_JS + """
+    (function(layer, map, results) {
+        var tip = L.tooltip({sticky: false});
+        layer.on("mouseover", function(e) {
+            var ac = e.layer.properties.ac, r = results[ac];
+            if (!r) return;
+            if (!r.dim) layer.setFeatureStyle(ac, Object.assign(wbTileStyle(ac), {{ this.highlight|tojson }}));
+            tip.setLatLng(e.latlng).setContent(wbTooltip(r)).addTo(map);
+        });
+        layer.on("mouseout", function(e) {
+            layer.resetFeatureStyle(e.layer.properties.ac);
+            tip.remove();
+        });
+        layer.on("click", function(e) {
+            var r = results[e.layer.properties.ac];
+            if (r) L.popup({maxWidth: 300}).setLatLng(e.latlng).setContent(wbPopup(r)).openOn(map);
+        });
+    })({{ this._parent.get_name() }}, {{ this._parent._parent.get_name() }}, {{ this.get_name() }});
+    {% endmacro %}
+    """)
+
+    def __init__(self, results):
+        super().__init__()
+        self._name     = "TileResults"
+        self.results   = results
+        self.dim       = DIM_STYLE
+        self.highlight = HIGHLIGHT_STYLE
+
+def _records(df):
+    # Row dicts, built column-wise (DataFrame.to_dict is row-by-row and slow)
+    cols = list(df.columns)
+    return [dict(zip(cols, vals)) for vals in zip(*(df[c].tolist() for c in cols))]
+
+def build_map(df, geojson, district_filter="All Districts",
+              dist_bbox=None, party_filter="All", legend_df=None, single_layer=True,
+              tiles_url=None, seat_counts=None):
+
+    if "AC_Key" not in df:
+        df = join_districts(df, geojson)
+    ft     = feature_table(geojson, geojson.get("sha256"))
+    lookup = dict(zip(df["AC_Key"], _records(df)))
+
+    allowed_dist  = set(ft["AC_Key"][ft["District"] == district_filter]) \
+                    if district_filter != "All Districts" else None
 
     if district_filter != "All Districts" and dist_bbox:
         start_loc  = [(dist_bbox[0][0]+dist_bbox[1][0])/2,
@@ -183,93 +565,67 @@ def build_map(df, geojson, district_filter="All Districts",
         [WB_BOUNDS[1][1]+0.5, WB_BOUNDS[1][0]+0.5],
     ]
 
-    for feature in geojson["features"]:
+    # Ship the simplified level one zoom step finer than the initial view;
+    # Leaflet draws it at full quality up to that zoom.
+    detail = min(start_zoom + 1, MAX_ZOOM)
+    shapes = geojson.get("levels", {}).get(detail)
+
+    features = []
+    for i, (feature, ac_key) in enumerate(zip(geojson["features"], ft["AC_Key"])):
         ac_raw = feature["properties"].get("ac_name", "")
-        ac_key = clean(ac_raw)
         dist   = feature["properties"].get("dist_name", "Unknown")
 
         if allowed_dist is not None and ac_key not in allowed_dist:
             continue
 
-        row = lookup.get(ac_key)
-
-        # Dim constituencies not in party filter
-        is_others = (party_filter == "Others")
-        in_others = (row is not None and row["Party"] not in ("BJP", "AITC"))
-        in_single = (row is not None and row["Party"] == party_filter)
+        row   = lookup.get(ac_key)
+        color = _ac_color(row, party_filter)
+        features.append((feature, shapes[i] if shapes else None, ac_raw, dist, row, color))
 
-        if party_filter not in ("All", "Others") and not in_single:
-            # Single-party filter: dim everything else
-            folium.GeoJson(
-                feature,
-                style_function=lambda x: {
-                    "fillColor": "#cccccc", "color": "#aaa",
-                    "weight": 0.4, "fillOpacity": 0.20
-                },
-            ).add_to(m)
-            continue
-        elif is_others and row is not None and not in_others:
-            # Others filter: dim BJP and AITC
+    if tiles_url:
+        # Geometry comes from the tile endpoint; only the per-AC attributes
+        # needed to colour and label it travel with the page.
+        layer = VectorGridProtobuf(tiles_url, "Constituencies", TILE_LAYER_OPTIONS, control=False)
+        layer.add_child(_TileResults({ac_raw: _ac_record(row, ac_raw, dist, color)
+                                      for _, _, ac_raw, dist, row, color in features}))
+        layer.add_to(m)
+    elif single_layer:
+        # One layer for the whole state: each feature carries its compact
+        # _ac_record and the popup/tooltip markup is built in the browser,
+        # instead of one Leaflet layer (or one popup string) per AC.
+        layer = folium.GeoJson(
+            {"type": "FeatureCollection", "features": [
+                dict(as_geojson(f, _ac_record(row, ac_raw, dist, c), shape), id=i)
+                for i, (f, shape, ac_raw, dist, row, c) in enumerate(features)
+            ]},
+            style_function=lambda x: DIM_STYLE if x["properties"].get("dim") else {
+                "fillColor": x["properties"]["c"], "color": "#555",
+                "weight": 0.7, "fillOpacity": 0.78
+            },
+            highlight_function=lambda x: {} if x["properties"].get("dim") else HIGHLIGHT_STYLE,
+        )
+        layer.add_child(_GeoJsonResults())
+        layer.add_to(m)
+    else:
+        for feature, shape, ac_raw, dist, row, color in features:
+            if color is None:
+                folium.GeoJson(as_geojson(feature, geometry=shape),
+                               style_function=lambda x: DIM_STYLE).add_to(m)
+                continue
             folium.GeoJson(
-                feature,
-                style_function=lambda x: {
-                    "fillColor": "#cccccc", "color": "#aaa",
-                    "weight": 0.4, "fillOpacity": 0.20
+                as_geojson(feature, geometry=shape),
+                style_function=lambda x, c=color: {
+                    "fillColor": c, "color": "#555", "weight": 0.7, "fillOpacity": 0.78
                 },
+                highlight_function=lambda x: HIGHLIGHT_STYLE,
+                popup=folium.Popup(_popup_html(row, ac_raw, dist, color), max_width=300),
+                tooltip=folium.Tooltip(_tooltip_text(row, ac_raw), sticky=False),
             ).add_to(m)
-            continue
-
-        color = PARTY_COLORS.get(row["Party"] if row is not None else "Other", "#CCCCCC") \
-                if row is not None else "#CCCCCC"
-        margin_str = f"{int(row['Margin']):,}" \
-                     if row is not None and pd.notna(row["Margin"]) else "N/A"
-
-        if row is not None:
-            popup_html = (
-                "<div style=\"font-family:Arial,sans-serif;font-size:13px;"
-                "line-height:1.75;min-width:230px;max-width:290px\">"
-                "<div style=\"background:" + color + ";color:white;padding:7px 11px;"
-                "border-radius:6px 6px 0 0;font-weight:700;font-size:14px;"
-                "display:flex;justify-content:space-between;align-items:center\">"
-                "<span>" + str(row["Constituency"]) + "</span>"
-                "<span style=\"font-size:11px;opacity:.9\">" + str(row["Party"]) + "</span>"
-                "</div>"
-                "<div style=\"padding:9px 11px;border:1px solid #ddd;"
-                "border-top:none;border-radius:0 0 6px 6px;background:#fff\">"
-                "<div style=\"margin-bottom:6px;color:#888;font-size:11px;font-weight:600;"
-                "letter-spacing:.4px;text-transform:uppercase\">AC No. "
-                + (str(int(row["Const. No."])) if pd.notna(row["Const. No."]) else "—") + "</div>"
-                "<div style=\"margin-bottom:3px\"><b>Winner</b>: " + str(row["Leading Candidate"]).title() + "</div>"
-                "<div style=\"margin-bottom:3px\"><b>Runner-up</b>: " + str(row["Trailing Candidate"]).title() + "</div>"
-                "<div style=\"margin-bottom:3px\"><b>Margin</b>: " + margin_str + " votes</div>"
-                "<div style=\"margin-bottom:3px\"><b>Category</b>: " + str(row["Margin_Cat"]) + "</div>"
-                "<div style=\"margin-bottom:3px\"><b>District</b>: " + dist + "</div>"
-                "<div><b>Status</b>: <span style=\"background:#e8f5e9;color:#2e7d32;"
-                "padding:1px 6px;border-radius:3px;font-size:11px;font-weight:600\">"
-                + str(row["Status"]) + "</span></div>"
-                "</div></div>"
-            )
-        else:
-            popup_html = "<b>" + ac_raw + "</b><br><i>No election data</i>"
-
-        tooltip_text = ac_raw if row is None \
-                       else str(row["Constituency"]) + " — " + str(row["Party"]) + " (+" + margin_str + ")"
-
-        folium.GeoJson(
-            feature,
-            style_function=lambda x, c=color: {
-                "fillColor": c, "color": "#555", "weight": 0.7, "fillOpacity": 0.78
-            },
-            highlight_function=lambda x: {
-                "weight": 2.5, "color": "#000", "fillOpacity": 0.93
-            },
-            popup=folium.Popup(popup_html, max_width=300),
-            tooltip=folium.Tooltip(tooltip_text, sticky=False),
-        ).add_to(m)
 
     # Legend — dynamic: uses district-filtered df if provided
-    leg_df      = legend_df if legend_df is not None else df
-    seat_counts = leg_df["Party"].value_counts().to_dict()
+    if seat_counts is None:
+        leg_df      = legend_df if legend_df is not None else df
+        seat_counts = leg_df["Party"].value_counts().to_dict()
     dist_label  = f" — {district_filter}" if district_filter != "All Districts" else ""
 
     legend_rows = "".join(
@@ -293,15 +649,70 @@ def build_map(df, geojson, district_filter="All Districts",
         + legend_rows + "</div>"
     ))
 
+    # clicks go to the page's host (map_view) for point-to-AC lookup
+    m.get_root().script.add_child(folium.Element(
+        "%s.on('click', function(e) { window.parent.postMessage("
+        "{wbClick: {lat: e.latlng.lat, lng: e.latlng.lng}}, '*'); });" % m.get_name()))
+
     return m
 
+# ── Rendered map cache ────────────────────────────────────────────────────────
+# Page HTML per filter combination.  Rendering dominates a rerun, and there are
+# only ~25 districts x 4 party filters; the data version is part of the key, so
+# new results or boundaries miss the cache and stale pages age out of the LRU.
+# WB_MAP_WARMUP=1 pre-renders the statewide views and each district's "All"
+# view in the background once per data version.
+MAP_CACHE_SIZE = int(os.environ.get("WB_MAP_CACHE", 48))
+MAP_WARMUP     = os.environ.get("WB_MAP_WARMUP") == "1"
+PARTY_FILTERS  = ("All", "BJP", "AITC", "Others")
+
+@cache_data(max_entries=MAP_CACHE_SIZE, show_spinner=False)
+def render_map(_df, _geojson, version, district_filter, party_filter, tiles_url=None):
+    m = build_map(_df, _geojson,
+                  district_filter=district_filter,
+                  dist_bbox=district_bounds(_geojson).get(district_filter),
+                  party_filter=party_filter,
+                  seat_counts=party_seats(aggregates(_df, _geojson), district_filter, party_filter),
+                  tiles_url=tiles_url)
+    return m.get_root().render()
+
+@st.cache_resource(show_spinner=False)
+def warm_map_cache(_df, _geojson, version, tiles_url=None):
+    combos = [("All Districts", p) for p in PARTY_FILTERS] \
+           + [(d, "All") for d in sorted(district_bounds(_geojson))]
+    def run():
+        for district, party in combos[:MAP_CACHE_SIZE]:
+            render_map(_df, _geojson, version, district, party, tiles_url)
+    thread = threading.Thread(target=run, daemon=True)
+    add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+
+# The page is shown through a small component (map_component/index.html)
+# rather than components.html so that map clicks come back to the app.
+_map_component = components.declare_component("wb_map", path=str(Path(__file__).parent / "map_component"))
+
+def map_view(html, height=600):
+    # last clicked point as {lat, lng, n}, or None; also in st.session_state["map_click"]
+    return _map_component(html=html, height=height, key="map_click", default=None)
+
 # ── Sidebar ───────────────────────────────────────────────────────────────────
-def sidebar(df, geojson, dist_bbox_map):
-    st.sidebar.markdown("""
+def election_picker():
+    # None = the current results CSV, else a stored (year, election)
+    stored = [e for e in stored_elections() if e != (CURRENT_YEAR, "general")]
+    if not stored:
+        return None
+    label = lambda e: f"{CURRENT_YEAR} (latest)" if e is None \
+                      else str(e[0]) if e[1] == "general" else f"{e[0]} · {e[1]}"
+    st.sidebar.markdown("### Election")
+    return st.sidebar.selectbox("Election:", [None] + stored, format_func=label,
+                                label_visibility="collapsed")
+
+def sidebar(df, geojson, dist_bbox_map, head=None, year=CURRENT_YEAR):
+    (head or st.sidebar).markdown(f"""
     <div class="logo-container">
         <div style="font-size:2rem">🗳️</div>
         <div style="color:#e0e0e0;font-size:1.3rem;font-weight:600;margin:.3rem 0">WB Election</div>
-        <div style="color:#FF9800;font-size:1rem;font-weight:700">2026</div>
+        <div style="color:#FF9800;font-size:1rem;font-weight:700">{year}</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -316,22 +727,19 @@ def sidebar(df, geojson, dist_bbox_map):
         help="Zoom into a single district", label_visibility="collapsed"
     )
 
+    agg = aggregates(df, geojson)
     if dist_choice != "All Districts":
-        dlookup = {clean(f["properties"].get("ac_name","")): f["properties"].get("dist_name","")
-                   for f in geojson["features"]}
-        ddf = df.copy()
-        ddf["District"] = ddf["Constituency"].apply(lambda x: dlookup.get(clean(x),"Unknown"))
-        ddf = ddf[ddf["District"] == dist_choice]
+        dstats = agg["districts"].get(dist_choice, {"seats": 0, "closest": None, "biggest": None})
 
         st.sidebar.markdown(
             "<div class=\"district-info\">"
             "<div style=\"color:#FFB74D;font-size:1rem;font-weight:700;margin-bottom:.3rem\">"
             + dist_choice +
             "</div><div style=\"color:#aaa;font-size:.9rem\">"
-            + str(len(ddf)) + " constituencies</div></div>",
+            + str(dstats["seats"]) + " constituencies</div></div>",
             unsafe_allow_html=True
         )
-        for party, n in ddf["Party"].value_counts().items():
+        for party, n in party_seats(agg, dist_choice).items():
             col = PARTY_COLORS.get(party, "#757575")
             st.sidebar.markdown(
                 "<div style=\"display:flex;align-items:center;gap:8px;margin-bottom:5px\">"
@@ -340,19 +748,22 @@ def sidebar(df, geojson, dist_bbox_map):
                 "<span style=\"font-size:13px;color:#e0e0e0\"><b>" + party + "</b> — " + str(n) + "</span></div>",
                 unsafe_allow_html=True
             )
-        closest = ddf.nsmallest(1, "Margin").iloc[0]
-        biggest = ddf.nlargest(1,  "Margin").iloc[0]
-        st.sidebar.caption(f"Closest: **{closest['Constituency']}** {int(closest['Margin']):,} votes")
-        st.sidebar.caption(f"Biggest: **{biggest['Constituency']}** {int(biggest['Margin']):,} votes")
+        if dstats["closest"]:
+            st.sidebar.caption(f"Closest: **{dstats['closest'][0]}** {int(dstats['closest'][1]):,} votes")
+            st.sidebar.caption(f"Biggest: **{dstats['biggest'][0]}** {int(dstats['biggest'][1]):,} votes")
+        bands = agg["bands"].get(dist_choice, {})
+        st.sidebar.caption("Margins: " + " · ".join(f"{b.partition('(')[2].rstrip(')') or b} **{n}**"
+                                                    for b, n in bands.items()))
 
     st.sidebar.markdown("---")
     st.sidebar.markdown("### State Summary")
-    seats = df["Party"].value_counts()
+    seats = party_seats(agg)
+    total = agg["districts"]["All Districts"]["seats"]
     for party, col in PARTY_COLORS.items():
         if party == "Other": continue
         n = seats.get(party, 0)
         if n == 0: continue
-        pct = n / len(df) * 100
+        pct = n / total * 100
         st.sidebar.markdown(
             "<div style=\"display:flex;align-items:center;gap:8px;margin-bottom:5px\">"
             "<div style=\"width:10px;height:10px;background:" + col + ";"
@@ -371,20 +782,129 @@ def sidebar(df, geojson, dist_bbox_map):
     )
     return dist_choice
 
+def find_constituency(df, geojson):
+    # The constituency under the last map click, or under typed coordinates
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### 📍 Find Constituency")
+    text  = st.sidebar.text_input("Coordinates", placeholder="lat, lon  e.g. 22.57, 88.36",
+                                  label_visibility="collapsed")
+    click = st.session_state.get("map_click")
+    if text:
+        try:
+            lat, lon = (float(v) for v in re.split(r"[,\s]+", text.strip()))
+        except ValueError:
+            st.sidebar.caption("Enter latitude and longitude, e.g. 22.57, 88.36")
+            return
+    elif click:
+        lat, lon = click["lat"], click["lng"]
+    else:
+        st.sidebar.caption("Click the map or enter coordinates")
+        return
+    i = ac_index(geojson, geojson.get("sha256")).locate(lat, lon)
+    if i < 0:
+        st.sidebar.caption("Outside West Bengal's constituencies")
+        return
+    ft   = feature_table(geojson, geojson.get("sha256")).iloc[i]
+    rows = df[df["AC_Key"] == ft["AC_Key"]]
+    if rows.empty:
+        st.sidebar.caption(f"**{ft['ac_name']}** ({ft['District']}) — no election data")
+        return
+    row = rows.iloc[-1]
+    st.sidebar.caption(f"**{row['Constituency']}** ({ft['District']}) — {row['Party']}, "
+                       f"margin {_margin_str(row)}")
+
+def live_updates(df):
+    # Constituencies that moved since this session last rendered
+    seen    = st.session_state.get("seen_version")
+    version = df.attrs.get("version")
+    st.session_state["seen_version"] = version
+    if st.session_state.pop("live_refreshed", False):
+        st.sidebar.markdown("---")
+        st.sidebar.markdown("**🔄 Results refreshed**")
+    if seen is None or seen == version:
+        return
+    changed = results_feed().changed_since(seen)
+    if changed is None:
+        # seen is older than the feed's change history: everything may have
+        # moved, so redraw the whole page from the current frame
+        st.session_state["live_refreshed"] = True
+        st.rerun()
+    if not changed:
+        return
+    names = df.loc[df["Const. No."].isin(changed), "Constituency"].tolist()
+    shown = ", ".join(names[:8]) + (f" +{len(names) - 8} more" if len(names) > 8 else "")
+    st.sidebar.markdown("---")
+    st.sidebar.markdown(f"**🔄 {len(names)} updated since last view**")
+    st.sidebar.caption(shown)
+
 # ── Main ──────────────────────────────────────────────────────────────────────
+def booth_view(df, election):
+    year, name = election or (CURRENT_YEAR, "general")
+    store = booth_store(year, name)
+    if store is None:
+        return
+    with st.expander("🏫 Booth-level results"):
+        acs   = df[df["Const. No."].isin(store.acs())].sort_values("Const. No.")
+        names = dict(zip(acs["Const. No."].astype(int), acs["Constituency"]))
+        ac    = st.selectbox("Constituency", [None, *names], key="booth_ac",
+                             format_func=lambda n: "Select a constituency…" if n is None
+                                                   else f"{n} · {names[n]}")
+        if ac is None:
+            return
+        booths = load_booths(year, name, ac, store.version)
+        if "Leading" in booths:
+            st.caption(f"{len(booths)} booths · booths led by party")
+            st.bar_chart(booths["Leading"].value_counts(), height=180)
+        st.dataframe(booths, use_container_width=True, hide_index=True)
+
+def swing_view():
+    years = sorted({y for y, e in stored_elections() if e == "general"})
+    if len(years) < 2:
+        return
+    with st.expander("🔀 Swing between elections"):
+        c1, c2 = st.columns(2)
+        base   = c1.selectbox("From", years, index=len(years) - 2)
+        target = c2.selectbox("To",   years, index=len(years) - 1)
+        if base == target:
+            st.caption("Pick two different years.")
+            return
+        sw    = load_swing(base, target)
+        seats = seat_change(sw).rename(index=lambda p: PARTY_ABBREV.get(p, p))
+        st.dataframe(seats.rename(columns={"base": str(base), "target": str(target)}),
+                     use_container_width=True)
+        flips = sw[sw["flipped"]].assign(
+            party_base=lambda d: d["party_base"].map(lambda p: PARTY_ABBREV.get(p, p)),
+            party_target=lambda d: d["party_target"].map(lambda p: PARTY_ABBREV.get(p, p)))
+        st.caption(f"{len(flips)} seats changed hands")
+        st.dataframe(flips[["ac_name", "party_base", "party_target", "margin_target"]]
+                     .rename(columns={"ac_name": "Constituency", "party_base": str(base),
+                                      "party_target": str(target), "margin_target": "Margin"}),
+                     use_container_width=True)
+
 def main():
-    df      = load_data()
-    geojson = load_geojson()
-    bbox_map = district_bounds(geojson)
+    profiling.begin()
+    with stage("load_geojson"):
+        geojson  = load_geojson()
+    head     = st.sidebar.container()     # logo sits above the election picker
+    election = election_picker()
+    year     = CURRENT_YEAR if election is None else election[0]
+    with stage("results"):
+        results  = current_results() if election is None else load_election(*election)
+    with stage("join_districts"):
+        df       = join_districts(results, geojson)
+        bbox_map = district_bounds(geojson)
 
-    dist_choice = sidebar(df, geojson, bbox_map)
-    dist_bbox   = bbox_map.get(dist_choice) if dist_choice != "All Districts" else None
+    with stage("sidebar"):
+        dist_choice = sidebar(df, geojson, bbox_map, head, year)
+        find_constituency(df, geojson)
+    if LIVE_POLL and election is None:
+        live_updates(df)
 
     # ── Header ────────────────────────────────────────────────────────────────
     st.markdown(
         "<div style=\"text-align:center;margin-bottom:1rem\">"
         "<h1 style=\"font-size:clamp(1.4rem,4vw,2.2rem);margin-bottom:.3rem\">"
-        "West Bengal Assembly Election 2026</h1>"
+        f"West Bengal Assembly Election {year}</h1>"
         "<p style=\"font-size:clamp(.85rem,2.5vw,1.1rem);color:#666;margin:0\">"
         "Interactive constituency results — click a card to filter the map"
         "</p></div>",
@@ -392,14 +912,16 @@ def main():
     )
 
     # ── Party filter pills ────────────────────────────────────────────────────
-    seats       = df["Party"].value_counts()
-    other_count = len(df) - seats.get("BJP", 0) - seats.get("AITC", 0)
+    agg         = aggregates(df, geojson)
+    seats       = party_seats(agg)
+    total       = agg["districts"]["All Districts"]["seats"]
+    other_count = sum(party_seats(agg, party_filter="Others").values())
 
     CARDS = [
         ("All",   "ALL SEATS", 294,                  "All constituencies",                 "#607D8B"),
-        ("BJP",   "BJP",       seats.get("BJP",  0), f"{seats.get('BJP', 0)/len(df)*100:.1f}%", "#FF9800"),
-        ("AITC",  "AITC",      seats.get("AITC", 0), f"{seats.get('AITC',0)/len(df)*100:.1f}%", "#1E88E5"),
-        ("Others","OTHERS",    other_count,           f"{other_count/len(df)*100:.1f}%",           "#4CAF50"),
+        ("BJP",   "BJP",       seats.get("BJP",  0), f"{seats.get('BJP', 0)/total*100:.1f}%", "#FF9800"),
+        ("AITC",  "AITC",      seats.get("AITC", 0), f"{seats.get('AITC',0)/total*100:.1f}%", "#1E88E5"),
+        ("Others","OTHERS",    other_count,           f"{other_count/total*100:.1f}%",           "#4CAF50"),
     ]
 
     # ── Pill filter bar — st.radio styled as pills (reliable on all devices) ────
@@ -408,13 +930,13 @@ def main():
 
     # Radio options with counts embedded
     radio_opts = [
-        f"All  {len(df)}",
+        f"All  {total}",
         f"BJP  {seats_bjp}",
         f"AITC  {seats_aitc}",
         f"Others  {other_count}",
     ]
     KEY_MAP = {
-        f"All  {len(df)}":          "All",
+        f"All  {total}":            "All",
         f"BJP  {seats_bjp}":        "BJP",
         f"AITC  {seats_aitc}":      "AITC",
         f"Others  {other_count}":   "Others",
@@ -478,72 +1000,55 @@ def main():
 
 
     # ── Map ───────────────────────────────────────────────────────────────────
-    pf = st.session_state["party_filter"]
-    # "Others" = all non-BJP/AITC; pass None and filter in map
-    map_party = None if pf in ("All", "Others") else pf
-
-    # For "Others", build list of other parties
-    other_parties = [p for p in df["Party"].unique() if p not in ("BJP","AITC")]
-
-    # Build legend_df: filter to district (and party if active)
-    dlookup_leg = {clean(f["properties"].get("ac_name","")): f["properties"].get("dist_name","")
-                   for f in geojson["features"]}
-    legend_df = df.copy()
-    legend_df["District"] = legend_df["Constituency"].apply(lambda x: dlookup_leg.get(clean(x),"Unknown"))
-    if dist_choice != "All Districts":
-        legend_df = legend_df[legend_df["District"] == dist_choice]
-    if pf == "Others":
-        legend_df = legend_df[~legend_df["Party"].isin(["BJP","AITC"])]
-    elif pf != "All":
-        legend_df = legend_df[legend_df["Party"] == pf]
-
-    with st.spinner("Rendering map..."):
-        m = build_map(df, geojson,
-                      district_filter=dist_choice,
-                      dist_bbox=dist_bbox,
-                      party_filter=map_party if pf not in ("All","Others") else pf,
-                      legend_df=legend_df)
+    pf        = st.session_state["party_filter"]
+    version   = data_version(df, geojson)
+    tiles_url = tile_server() if TILE_PORT else None
+    if MAP_WARMUP:
+        warm_map_cache(df, geojson, version, tiles_url)
 
     st.markdown("<div style=\"border-radius:0 0 12px 12px;overflow:hidden;box-shadow:0 4px 20px rgba(0,0,0,.18)\">", unsafe_allow_html=True)
-    st_folium(m, width="100%", height=600, returned_objects=[])
+    with st.spinner("Rendering map..."):
+        html = render_map(df, geojson, version, dist_choice, pf, tiles_url)
+    with stage("map transfer") as span:
+        map_view(html)
+    if profiling.active():
+        span["bytes"] = len(html.encode())     # measured outside the timed block
     st.markdown("</div>", unsafe_allow_html=True)
     # st.caption(f"Hover for quick info · Tap for details · Zoom {MIN_ZOOM}–{MAX_ZOOM}")
     st.caption(f"Hover for quick info · Click/tap for details · This app is purely experimental and under development, so if there are data inconsistencies from developers side, that's my fault, not ECIs.")
 
     # ── Party-filtered results table ──────────────────────────────────────────
-    show_df = df.copy()
-
-    # Attach district
-    dlookup2 = {clean(f["properties"].get("ac_name","")): f["properties"].get("dist_name","")
-                for f in geojson["features"]}
-    show_df["District"] = show_df["Constituency"].apply(lambda x: dlookup2.get(clean(x),"Unknown"))
-
-    # Apply district filter
-    if dist_choice != "All Districts":
-        show_df = show_df[show_df["District"] == dist_choice]
-
-    # Apply party filter
-    if pf == "Others":
-        show_df = show_df[~show_df["Party"].isin(["BJP","AITC"])]
-    elif pf != "All":
-        show_df = show_df[show_df["Party"] == pf]
-
-    show_df = show_df[["Constituency","Party","Leading Candidate",
-                        "Trailing Candidate","Margin","Margin_Cat","District","Status"]]\
-              .sort_values("Margin", ascending=False)\
-              .reset_index(drop=True)
+    table = results_table(df, geojson)
 
     title_parts = []
     if pf != "All":   title_parts.append(pf)
     if dist_choice != "All Districts": title_parts.append(dist_choice)
     title_str = " · ".join(title_parts) if title_parts else "All Constituencies"
 
-    with st.expander(
-        f"📋 Results: {title_str} — {len(show_df)} seats  "
-        f"(sorted highest → lowest margin)",
+    with stage("results table"), st.expander(
+        f"📋 Results: {title_str} — {sum(party_seats(agg, dist_choice, pf).values())} seats",
         expanded=(pf != "All" or dist_choice != "All Districts")
     ):
-        st.dataframe(show_df, use_container_width=True, hide_index=True)
+        c1, c2, c3, c4 = st.columns([3, 3, 2, 2])
+        band    = c1.selectbox("Margin band", ["All", *MARGIN_LABELS], key="table_band")
+        sort_by = c2.selectbox("Sort by", TABLE_COLUMNS, index=TABLE_COLUMNS.index("Margin"),
+                               key="table_sort")
+        desc    = c3.toggle("Highest first", value=True, key="table_desc")
+        filters = table_filters(dist_choice, pf, band)
+        pages   = max(1, -(-table.count(filters) // PAGE_SIZE))
+        # a narrower filter can leave the stored page past the end
+        st.session_state["table_page"] = min(st.session_state.get("table_page", 1), pages)
+        page    = c4.number_input("Page", min_value=1, max_value=pages, step=1, key="table_page")
+        rows, total = table.page(filters, sort_by, not desc, page - 1)
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        first = (page - 1) * PAGE_SIZE
+        st.caption(f"Rows {min(first + 1, total)}–{first + len(rows)} of {total}")
+
+    with stage("booths"):
+        booth_view(df, election)
+    with stage("swing"):
+        swing_view()
+    profiling.panel()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,564 @@
+# ── Benchmarks ────────────────────────────────────────────────────────────────
+# Headless timings for the dashboard's data pipeline.  Runs against a local KML
+# (pass a path) or a synthetic one shaped like the 294-AC boundary file.
+#
+#   python bench.py [wb_acs_map.kml]
+#
+# ``suite`` runs every stage the dashboard goes through (see SUITE below) at
+# several synthetic scales, with no network access, and reports wall time,
+# peak RSS growth and map HTML bytes per stage.  Against a saved baseline it exits
+# non-zero when a stage got slower, bigger or hungrier than the thresholds.
+# Every stage runs several times and is compared on its median; a metric only
+# counts as a regression when it grew by both the relative tolerance and the
+# absolute floor (MIN_MS / MIN_MB), so timer jitter on short stages never trips it.
+#
+#   python bench.py suite --save               # record bench_baseline.json
+#   python bench.py suite --scales 1,10,100    # compare against it
+#
+# ``live`` checks the live.ResultsFeed poll/diff path against a local HTTP
+# stand-in for the GitHub CSV: conditional requests, the changed-row sets,
+# the patched frame against a full re-prepare, and changed_since.
+#
+#   python bench.py live [--scale 10] [--rounds 20]
+import sys, io, os, json, time, tempfile, threading, tracemalloc, argparse, statistics, gc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from boundaries import (iter_kml_features, write_cache, read_cache,
+                        simplify_levels, zoom_tolerance)
+from util import import_app
+
+HERE = Path(__file__).parent
+
+
+# ── Fixtures ──────────────────────────────────────────────────────────────────
+def synthetic_kml(n_acs=294, n_pts=1500, n_holes=0, seed=0):
+    """KML bytes with ``n_acs`` ring-shaped Placemarks laid out over WB."""
+    rng   = np.random.default_rng(seed)
+    names = pd.read_csv(HERE / "election_data.csv")["Constituency"].tolist()
+    cols  = int(np.ceil(np.sqrt(n_acs)))
+    out   = io.StringIO()
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<kml xmlns="http://www.opengis.net/kml/2.2"><Document><Folder>\n')
+    for i in range(n_acs):
+        cx = 85.9 + (i % cols) * 3.9 / cols
+        cy = 21.5 + (i // cols) * 5.7 / cols
+        r  = 1.5 / cols
+        t  = np.linspace(0, 2 * np.pi, n_pts)
+        # smooth wobble plus fine digitising noise, like a surveyed boundary
+        jitter = (1 + 0.08 * np.sin(5 * t + rng.uniform(0, 6.3))
+                    + 0.04 * np.sin(11 * t + rng.uniform(0, 6.3))
+                    + 0.002 * rng.standard_normal(n_pts))
+
+        def ring(scale):
+            xs = cx + scale * r * jitter * np.cos(t)
+            ys = cy + scale * r * jitter * np.sin(t)
+            xs[-1], ys[-1] = xs[0], ys[0]
+            return " ".join(f"{x:.6f},{y:.6f},0" for x, y in zip(xs, ys))
+
+        name = names[i % len(names)] + ("" if i < len(names) else f" {i // len(names)}")
+        out.write(
+            "<Placemark><ExtendedData><SchemaData schemaUrl=\"#wb\">"
+            f"<SimpleData name=\"ac_name\">{name}</SimpleData>"
+            f"<SimpleData name=\"dist_name\">District {i % 23}</SimpleData>"
+            "</SchemaData></ExtendedData><Polygon><outerBoundaryIs><LinearRing>"
+            f"<coordinates>{ring(1.0)}</coordinates></LinearRing></outerBoundaryIs>"
+            + "".join(
+                "<innerBoundaryIs><LinearRing>"
+                f"<coordinates>{ring(0.1 * (h + 1))}</coordinates>"
+                "</LinearRing></innerBoundaryIs>"
+                for h in range(n_holes))
+            + "</Polygon></Placemark>\n")
+    out.write("</Folder></Document></kml>\n")
+    return out.getvalue().encode()
+
+
+# ── Reference implementation (pre-streaming load_geojson) ─────────────────────
+def legacy_parse(content):
+    root = ET.fromstring(content)
+    ns = {"kml": "http://www.opengis.net/kml/2.2"}
+    features = []
+    for pm in root.findall(".//kml:Placemark", ns):
+        try:
+            props = {}
+            sd = pm.find(".//kml:SchemaData", ns)
+            if sd is not None:
+                for item in sd.findall(".//kml:SimpleData", ns):
+                    props[item.get("name")] = item.text
+            ce = pm.find(".//kml:coordinates", ns)
+            if ce is None or not ce.text:
+                continue
+            coords = []
+            for c in ce.text.strip().split():
+                p = c.split(",")
+                if len(p) >= 2:
+                    coords.append([float(p[0]), float(p[1])])
+            if len(coords) < 3:
+                continue
+            features.append({
+                "type": "Feature",
+                "properties": props,
+                "geometry": {"type": "Polygon", "coordinates": [coords]},
+            })
+        except Exception:
+            pass
+    return {"type": "FeatureCollection", "features": features}
+
+
+def streaming_parse(content):
+    return {"type": "FeatureCollection",
+            "features": list(iter_kml_features(io.BytesIO(content)))}
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+def measure(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def bench_kml(content):
+    print(f"KML: {len(content)/1e6:.1f} MB")
+    t_old, m_old = measure(legacy_parse, content)
+    t_new, m_new = measure(streaming_parse, content)
+    print(f"  legacy     {t_old*1000:8.1f} ms   peak {m_old/1e6:7.1f} MB")
+    print(f"  streaming  {t_new*1000:8.1f} ms   peak {m_new/1e6:7.1f} MB")
+    print(f"  speedup    {t_old/t_new:8.1f}x")
+
+
+
+def bench_cache(content):
+    geojson = streaming_parse(content)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bounds.bin")
+        t_w, _ = measure(write_cache, path, geojson, repeat=1)
+        t_r, m_r = measure(read_cache, path)
+        size = os.path.getsize(path)
+    print(f"Boundary cache: {size/1e6:.1f} MB")
+    print(f"  write      {t_w*1000:8.1f} ms")
+    print(f"  mmap load  {t_r*1000:8.1f} ms   peak {m_r/1e6:7.1f} MB")
+
+
+
+def legacy_join(df, geojson):
+    # Per-rerun work before join_districts: sidebar, legend and table each
+    # re-derived District row by row, build_map walked iterrows().
+    from app import clean
+    for _ in range(3):
+        dlookup = {clean(f["properties"].get("ac_name", "")): f["properties"].get("dist_name", "")
+                   for f in geojson["features"]}
+        out = df.copy()
+        out["District"] = out["Constituency"].apply(lambda x: dlookup.get(clean(x), "Unknown"))
+    lookup = {clean(r["Constituency"]): r for _, r in df.iterrows()}
+    keys   = [clean(f["properties"].get("ac_name", "")) for f in geojson["features"]]
+    return out, lookup, keys
+
+
+def vector_join(df, geojson, version):
+    from app import _join_districts, feature_table, _records
+    ft     = feature_table(geojson, version[1])
+    out    = _join_districts(df, geojson, version)
+    lookup = dict(zip(out["AC_Key"], _records(out)))
+    return out, lookup, ft["AC_Key"]
+
+
+def legacy_prepare(df):
+    # load_data before margin bands and categorical columns
+    from app import PARTY_ABBREV
+    df["Margin"]       = pd.to_numeric(df["Margin"],     errors="coerce")
+    df["Const. No."]   = pd.to_numeric(df["Const. No."], errors="coerce")
+    df["Constituency"] = df["Constituency"].str.strip()
+    df["Party"]        = df["Leading Party"].map(PARTY_ABBREV).fillna("Other")
+    def mcat(m):
+        if pd.isna(m): return "Unknown"
+        if m <  1000:  return "Extremely Close (<1K)"
+        if m <  5000:  return "Very Close (1-5K)"
+        if m < 10000:  return "Close (5-10K)"
+        if m < 30000:  return "Comfortable (10-30K)"
+        return         "Landslide (>30K)"
+    df["Margin_Cat"] = df["Margin"].apply(mcat)
+    return df
+
+
+def bench_prepare(scale=200):
+    app = import_app()
+    raw = pd.concat([pd.read_csv(HERE / "election_data.csv")] * scale, ignore_index=True)
+    old = legacy_prepare(raw.copy())
+    new = app.prepare_results(raw.copy())
+    t_old, _ = measure(lambda: legacy_prepare(raw.copy()))
+    t_new, _ = measure(lambda: app.prepare_results(raw.copy()))
+    f_old, _ = measure(lambda: old[old["Party"].isin(["BJP", "AITC"])]["Margin_Cat"].value_counts())
+    f_new, _ = measure(lambda: new[new["Party"].isin(["BJP", "AITC"])]["Margin_Cat"].value_counts())
+    print(f"prepare_results ({len(raw)} rows)")
+    print(f"  legacy     {t_old*1000:8.1f} ms   filter+count {f_old*1000:6.1f} ms"
+          f"   {old.memory_usage(deep=True).sum()/1e6:6.1f} MB")
+    print(f"  banded     {t_new*1000:8.1f} ms   filter+count {f_new*1000:6.1f} ms"
+          f"   {new.memory_usage(deep=True).sum()/1e6:6.1f} MB")
+
+
+def bench_join(content):
+    app     = import_app()
+    df      = app.load_data(HERE / "election_data.csv")
+    geojson = streaming_parse(content)
+    cold    = ((n, n) for n in range(10**6))    # a fresh version per call misses the cache
+    t_old, _  = measure(legacy_join, df, geojson)
+    t_cold, _ = measure(lambda: vector_join(df, geojson, next(cold)))
+    vector_join(df, geojson, ("warm", "warm"))
+    t_warm, _ = measure(vector_join, df, geojson, ("warm", "warm"))
+    print(f"District join ({len(df)} rows x {len(geojson['features'])} features, per rerun)")
+    print(f"  legacy     {t_old*1000:8.1f} ms")
+    print(f"  first run  {t_cold*1000:8.1f} ms")
+    print(f"  cached     {t_warm*1000:8.1f} ms")
+    print(f"  speedup    {t_old/t_warm:8.1f}x")
+
+
+def bench_table(content, scale=300):
+    # booth-scale frame: every interaction used to filter, sort and ship it all
+    from table import ResultsTable
+    app     = import_app()
+    geojson = dict(streaming_parse(content), sha256="bench")
+    df      = app.load_data(HERE / "election_data.csv")
+    big     = pd.concat([df] * scale, ignore_index=True)
+    big     = app._join_districts(big, geojson, ("bench", "bench"))
+    pf      = app.table_filters("District 3", "Others")
+    legacy  = lambda: big[(big["District"] == "District 3") & ~big["Party"].isin(["BJP", "AITC"])] \
+                      [app.TABLE_COLUMNS].sort_values("Margin", ascending=False).reset_index(drop=True)
+    build   = lambda: ResultsTable(big, app.TABLE_COLUMNS, app.TABLE_PRESORT, app.TABLE_PREFILTER)
+    fresh   = iter([build() for _ in range(4)])            # measure() calls its fn 4 times
+    t_old, _   = measure(legacy)
+    t_lazy, _  = measure(lambda: ResultsTable(big, app.TABLE_COLUMNS).page(pf, "Margin", False))
+    t_build, _ = measure(build)
+    t_cold, _  = measure(lambda: next(fresh).page(pf, "Margin", False))
+    table = build()
+    table.page(pf, "Margin", False)
+    t_page, _ = measure(lambda: table.page(pf, "Margin", False, 2))
+    print(f"Results table ({len(big)} rows)")
+    print(f"  legacy     {t_old*1000:8.1f} ms")
+    print(f"  unprimed   {t_lazy*1000:8.1f} ms   build + first page, nothing prebuilt")
+    print(f"  build      {t_build*1000:8.1f} ms   once per data version")
+    print(f"  first page {t_cold*1000:8.1f} ms")
+    print(f"  next page  {t_page*1000:8.1f} ms")
+
+
+def bench_map(content):
+    app     = import_app()
+    df      = app.load_data(HERE / "election_data.csv")
+    full    = streaming_parse(content)
+    t, _    = measure(simplify_levels, full["features"],
+                      {z: zoom_tolerance(z) for z in app.LEVEL_ZOOMS}, repeat=1)
+    print(f"simplify_levels {t*1000:8.1f} ms")
+    leveled = dict(full, levels=simplify_levels(full["features"],
+                                                {z: zoom_tolerance(z) for z in app.LEVEL_ZOOMS}))
+    print("build_map (statewide, All)")
+    tiles = "http://localhost/tiles/v/{z}/{x}/{y}.pbf"
+    for label, geojson, single, url in (("per-AC", full, False, None), ("single", full, True, None),
+                                        ("simplified", leveled, True, None),
+                                        ("tiles", leveled, True, tiles)):
+        build = lambda: app.build_map(df, geojson, single_layer=single,
+                                      tiles_url=url).get_root().render()
+        t, _  = measure(build)
+        print(f"  {label:<10} {t*1000:8.1f} ms   html {len(build().encode())/1e6:7.2f} MB")
+    t, _ = measure(cut_tiles_all, leveled, range(app.MIN_ZOOM, app.MAX_ZOOM + 1), repeat=1)
+    print(f"cut_tiles       {t*1000:8.1f} ms")
+
+
+def bench_spatial(content, n_points=100_000):
+    from spatial import ACIndex
+    geojson  = streaming_parse(content)
+    t_b, m_b = measure(ACIndex, geojson, repeat=1)
+    index    = ACIndex(geojson)
+    rng      = np.random.default_rng(0)
+    lat, lon = rng.uniform(21.4, 27.3, n_points), rng.uniform(85.8, 89.9, n_points)
+    t_1, _   = measure(lambda: [index.locate(a, o) for a, o in zip(lat[:1000], lon[:1000])])
+    t_n, m_n = measure(index.assign, lat, lon)
+    print(f"AC index ({len(geojson['features'])} ACs)")
+    print(f"  build      {t_b*1000:8.1f} ms   peak {m_b/1e6:7.1f} MB")
+    print(f"  locate     {t_1*1000:8.3f} us/point")
+    print(f"  assign     {t_n*1000:8.1f} ms   {n_points} points, peak {m_n/1e6:7.1f} MB")
+
+
+def cut_tiles_all(geojson, zooms):
+    from tiles import cut_tiles
+    return sum(len(data) for *_, data in cut_tiles(geojson, zooms))
+
+
+# ── Suite ─────────────────────────────────────────────────────────────────────
+BASELINE  = HERE / "bench_baseline.json"
+TOLERANCE = {"ms": 0.35, "rss_delta_mb": 0.20, "html_bytes": 0.05}   # allowed growth
+MIN_MS    = 50.0    # wall-time growth below this is noise, never flagged
+MIN_MB    = 10.0    # so is RSS growth below this
+FLOOR     = {"ms": MIN_MS, "rss_delta_mb": MIN_MB}
+
+
+def synthetic_results(n_acs):
+    """Results CSV rows matching ``synthetic_kml(n_acs)`` names."""
+    base = pd.read_csv(HERE / "election_data.csv")
+    reps = -(-n_acs // len(base))
+    df   = pd.concat([base] * reps, ignore_index=True).iloc[:n_acs].copy()
+    copy = np.arange(n_acs) // len(base)
+    df["Constituency"] = df["Constituency"].astype(str) \
+                         + np.where(copy > 0, " " + copy.astype(str), "")
+    df["Const. No."]   = np.arange(1, n_acs + 1)
+    return df
+
+
+class _PeakRSS:
+    # Samples this process's resident set while a stage runs; ``peak`` is the
+    # highest value above the RSS at entry, so it measures the stage rather
+    # than the process (Linux /proc; elsewhere the tracemalloc peak of the
+    # Python allocations made during the stage).
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.page     = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self.proc     = Path("/proc/self/statm").exists()
+
+    def _rss(self):
+        return int(Path("/proc/self/statm").read_text().split()[1]) * self.page
+
+    def __enter__(self):
+        self.peak, self._stop = 0, threading.Event()
+        if self.proc:
+            self.base = self._rss()
+            def run():
+                while not self._stop.is_set():
+                    self.peak = max(self.peak, self._rss() - self.base)
+                    self._stop.wait(self.interval)
+            self._thread = threading.Thread(target=run, daemon=True)
+            self._thread.start()
+        else:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.proc:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, self._rss() - self.base)
+        else:
+            self.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+
+def run_stage(fn, setup=None, repeat=5):
+    """``(result, {"ms", "rss_delta_mb"})``: median wall time and median peak
+    RSS growth over the runs."""
+    times, peaks, out = [], [], None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()        # don't bill this run for the previous one's garbage
+        with _PeakRSS() as rss:
+            t0  = time.perf_counter()
+            out = fn()
+            times.append(time.perf_counter() - t0)
+        peaks.append(rss.peak)
+    return out, {"ms": round(statistics.median(times) * 1000, 2),
+                 "rss_delta_mb": round(statistics.median(peaks) / 1e6, 1)}
+
+
+def _serve(root):
+    # local stand-in for the GitHub raw endpoint load_geojson fetches from
+    import http.server, functools
+
+    class Quiet(http.server.SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Quiet, directory=root))
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def suite(scale, n_pts=300):
+    """Stage → metrics for ``scale`` × the 294 ACs."""
+    app    = import_app()
+    n_acs  = 294 * scale
+    out    = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "wb_acs_map.kml").write_bytes(synthetic_kml(n_acs, n_pts=n_pts))
+        synthetic_results(n_acs).to_csv(tmp / "election_data.csv", index=False)
+        srv = _serve(tmp)
+        app.KML_URL        = f"http://127.0.0.1:{srv.server_port}/wb_acs_map.kml"
+        app.BOUNDARY_CACHE = tmp / "wb_acs_map.bin"
+        app.AC_MAPPING     = tmp / "ac_mapping.csv"
+
+        def stage(name, fn, setup=None):
+            res, out[name] = run_stage(fn, setup)
+            return res
+
+        cold_geo = lambda: (app.load_geojson.clear(), app.BOUNDARY_CACHE.unlink(missing_ok=True))
+        df = stage("load_data", lambda: app.load_data(tmp / "election_data.csv"), app.load_data.clear)
+        stage("load_geojson cold", app.load_geojson, cold_geo)
+        geo = stage("load_geojson cached", app.load_geojson, app.load_geojson.clear)
+        # the boundary cache stores the bounds; time computing them
+        stage("district_bounds", lambda: app.district_bounds(
+            {k: v for k, v in geo.items() if k != "district_bounds"}))
+        df  = stage("join_districts", lambda: app.join_districts(df, geo), app._join_districts.clear)
+        agg = stage("aggregates", lambda: app.aggregates(df, geo), app._aggregates.clear)
+        table = stage("results_table", lambda: app.ResultsTable(df, app.TABLE_COLUMNS))
+        stage("filter paths", lambda: [
+            (table.page(app.table_filters(d, p), "Margin", False), app.party_seats(agg, d, p))
+            for d in ("All Districts", "District 3") for p in app.PARTY_FILTERS])
+        bounds = app.district_bounds(geo)
+        for label, d, p in (("statewide", "All Districts", "All"), ("district", "District 3", "BJP")):
+            html = stage(f"build_map {label}", lambda: app.build_map(
+                df, geo, d, bounds.get(d), p,
+                seat_counts=app.party_seats(agg, d, p)).get_root().render())
+            out[f"build_map {label}"]["html_bytes"] = len(html.encode())
+        srv.shutdown()
+    return out
+
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    """``[(key, metric, was, now)]`` that grew by more than ``tolerance`` and
+    by more than the metric's absolute floor."""
+    bad = []
+    for key, now in results.items():
+        was = baseline.get(key)
+        if was is None:
+            continue
+        for metric, tol in tolerance.items():
+            a, b = was.get(metric), now.get(metric)
+            if a is None or b is None:
+                continue
+            if b > a * (1 + tol) and b - a > FLOOR.get(metric, 0):
+                bad.append((key, metric, a, b))
+    return bad
+
+
+def run_suite(argv):
+    ap = argparse.ArgumentParser(prog="bench.py suite")
+    ap.add_argument("--scales", default="1,10", help="comma-separated multiples of 294 ACs")
+    ap.add_argument("--points", type=int, default=300, help="vertices per synthetic AC ring")
+    ap.add_argument("--baseline", type=Path, default=BASELINE)
+    ap.add_argument("--save", action="store_true", help="write results as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE["ms"],
+                    help="allowed wall-time growth (0.35 = 35%%)")
+    args = ap.parse_args(argv)
+
+    results = {}
+    for scale in map(int, args.scales.split(",")):
+        print(f"{scale}x ({294 * scale} ACs)")
+        for name, m in suite(scale, args.points).items():
+            results[f"{name} @{scale}x"] = m
+            html = f"   html {m['html_bytes']/1e6:7.2f} MB" if "html_bytes" in m else ""
+            print(f"  {name:<20} {m['ms']:10.1f} ms   rss +{m['rss_delta_mb']:7.1f} MB{html}")
+
+    if args.save:
+        args.baseline.write_text(json.dumps(results, indent=1))
+        print(f"baseline -> {args.baseline}")
+        return 0
+    try:
+        baseline = json.loads(args.baseline.read_text())
+    except OSError:
+        print("no baseline; run with --save first")
+        return 0
+    bad = regressions(results, baseline, dict(TOLERANCE, ms=args.tolerance))
+    for key, metric, was, now in bad:
+        print(f"REGRESSION {key}: {metric} {was} -> {now}")
+    return 1 if bad else 0
+
+
+# ── Live feed ─────────────────────────────────────────────────────────────────
+def live_check(scale=1, rounds=10, seed=0):
+    """``[(check, ok, detail)]`` for the poll/diff path of ResultsFeed."""
+    from live import ResultsFeed
+    app    = import_app()
+    rng    = np.random.default_rng(seed)
+    checks = []
+    check  = lambda name, ok, detail="": checks.append((name, bool(ok), detail))
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = Path(tmp) / "election_data.csv"
+        raw = synthetic_results(294 * scale)
+        t   = [1_700_000_000]
+
+        def publish(frame):
+            # a new mtime per snapshot: the stand-in answers If-Modified-Since
+            frame.to_csv(csv, index=False)
+            t[0] += 10
+            os.utime(csv, (t[0], t[0]))
+
+        publish(raw)
+        srv   = _serve(tmp)
+        feed  = ResultsFeed(f"http://127.0.0.1:{srv.server_port}/election_data.csv",
+                            app.prepare_results, interval=0, history=4)
+        codes = []
+        feed.session.hooks["response"].append(lambda r, *a, **k: codes.append(r.status_code))
+
+        check("first poll loads every row", feed.poll() == set(raw["Const. No."]))
+        v0 = feed.version
+        check("unchanged file is a 304", feed.poll() == set() and codes[-1] == 304, codes[-1])
+
+        parties = raw["Leading Party"].dropna().unique()
+        times   = []
+        for _ in range(rounds):
+            # a few margins move and a couple of seats may flip
+            before = pd.read_csv(csv)
+            idx    = rng.choice(len(raw), size=5, replace=False)
+            margin = pd.to_numeric(raw.loc[idx[:3], "Margin"], errors="coerce").fillna(0) + 1
+            raw.loc[idx[:3], "Margin"] = margin.astype(int).astype(str)     # a text column
+            raw.loc[idx[3:], "Leading Party"] = rng.choice(parties, size=2)
+            publish(raw)
+            after  = pd.read_csv(csv)
+            diff   = ~(after.eq(before) | (after.isna() & before.isna())).all(axis=1)
+            t0      = time.perf_counter()
+            changed = feed.poll()
+            times.append(time.perf_counter() - t0)
+            want    = set(after.loc[diff, "Const. No."])
+            check("changed rows reported", changed == want, f"{sorted(changed)} != {sorted(want)}")
+
+        full = app.prepare_results(raw.copy())
+        same = feed.frame.astype({c: object for c in full.columns[full.dtypes == "category"]}) \
+                   .equals(full.astype({c: object for c in full.columns[full.dtypes == "category"]}))
+        check("patched frame equals a full prepare", same)
+        check("changed_since(latest) is empty", feed.changed_since(feed.version) == set())
+        check("changed_since(expired) is None", feed.changed_since(v0) is None,
+              "history=4, so the first version is gone")
+        check("changed_since(unknown) is None", feed.changed_since("nope") is None)
+        srv.shutdown()
+    ms = statistics.median(times) * 1000
+    print(f"live feed ({len(raw)} rows, {rounds} rounds): median poll+patch {ms:.1f} ms")
+    return checks
+
+
+def run_live(argv):
+    ap = argparse.ArgumentParser(prog="bench.py live")
+    ap.add_argument("--scale", type=int, default=1, help="multiple of 294 ACs")
+    ap.add_argument("--rounds", type=int, default=10)
+    args   = ap.parse_args(argv)
+    checks = live_check(args.scale, args.rounds)
+    failed = {}
+    for name, ok, detail in checks:
+        if not ok:
+            failed.setdefault(name, detail)
+    for name in dict.fromkeys(n for n, _, _ in checks):
+        print(f"  {'FAIL' if name in failed else 'ok  '} {name}"
+              + (f"  ({failed[name]})" if name in failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["suite"]:
+        sys.exit(run_suite(sys.argv[2:]))
+    if sys.argv[1:2] == ["live"]:
+        sys.exit(run_live(sys.argv[2:]))
+    content = Path(sys.argv[1]).read_bytes() if len(sys.argv) > 1 else synthetic_kml()
+    with tempfile.TemporaryDirectory() as tmp:
+        import_app().AC_MAPPING = Path(tmp) / "ac_mapping.csv"   # keep the real mapping out of it
+        bench_kml(content)
+        bench_cache(content)
+        bench_prepare()
+        bench_join(content)
+        bench_spatial(content)
+        bench_table(content)
+        bench_map(content)
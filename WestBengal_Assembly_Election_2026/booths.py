@@ -0,0 +1,148 @@
+# ── Booth-level results store ─────────────────────────────────────────────────
+# Polling-station results (Form 20: one row per booth and candidate) are far
+# larger than the AC table, so they live in their own Parquet files laid out
+# like the history store:
+#
+#   <root>/state=WB/year=2026/general.parquet
+#
+# Each file is sorted by ac_no and written one row group per AC, so the row
+# group statistics are an index from Const. No. to the chunk holding it.
+# Opening an AC reads only the footer (once per file) and that AC's row
+# groups; nothing else is decoded.
+#
+#   python booths.py ingest form20.csv WB 2026 [general]
+#   python booths.py show WB 2026 123
+import os, sys, threading
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from util import atomic_path
+
+# source column → store column (Form 20 exports vary; anything else is kept)
+CSV_COLUMNS = {
+    "Const. No.":  "ac_no",
+    "AC No.":      "ac_no",
+    "Booth No.":   "booth_no",
+    "PS No.":      "booth_no",
+    "Booth Name":  "booth_name",
+    "PS Name":     "booth_name",
+    "Candidate":   "candidate",
+    "Party":       "party",
+    "Votes":       "votes",
+}
+
+
+def path_for(root, state, year, election="general"):
+    return Path(root) / f"state={state}" / f"year={int(year)}" / f"{election}.parquet"
+
+
+def ingest(root, df, state, year, election="general", columns=CSV_COLUMNS):
+    """Write (or replace) one election's booth file; returns its path."""
+    out = df.rename(columns={k: v for k, v in columns.items() if k in df})
+    out["ac_no"] = pd.to_numeric(out["ac_no"], errors="coerce")
+    out = out.dropna(subset=["ac_no"]).astype({"ac_no": "int32"})
+    if "votes" in out:
+        out["votes"] = pd.to_numeric(out["votes"], errors="coerce").fillna(0).astype("int64")
+    out   = out.sort_values(["ac_no", *[c for c in ("booth_no",) if c in out]], kind="stable")
+    table = pa.Table.from_pandas(out, preserve_index=False)
+    path  = path_for(root, state, year, election)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_path(path) as tmp, pq.ParquetWriter(tmp, table.schema, compression="zstd") as w:
+        ac = table.column("ac_no").to_numpy()
+        bounds = [0, *((ac[1:] != ac[:-1]).nonzero()[0] + 1), len(ac)]
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            w.write_table(table.slice(lo, hi - lo))     # one row group per AC
+    return path
+
+
+class BoothStore:
+    """Reader for one booth file; ``read(ac_no)`` loads a single AC.
+
+    The footer is parsed once and kept as ``{ac_no: [row group, ...]}``;
+    ``version`` changes whenever the file is re-ingested.
+    """
+
+    def __init__(self, path):
+        self.path    = Path(path)
+        self.version = self.path.stat().st_mtime_ns
+        self.file    = pq.ParquetFile(self.path)
+        self._lock   = threading.Lock()
+        meta = self.file.metadata
+        col  = meta.schema.names.index("ac_no")
+        self.groups = {}
+        self._mixed = set()     # row groups holding more than one AC
+        for i in range(meta.num_row_groups):
+            stats = meta.row_group(i).column(col).statistics
+            if stats is not None and stats.has_min_max and stats.min == stats.max:
+                acs = [int(stats.min)]
+            else:
+                # no statistics, or a min-max range that needn't be dense:
+                # read the group's AC column
+                self._mixed.add(i)
+                acs = pc.drop_null(pc.unique(self.file.read_row_group(i, columns=["ac_no"])
+                                             .column("ac_no"))).to_pylist()
+            for ac in acs:
+                self.groups.setdefault(int(ac), []).append(i)
+
+    def __contains__(self, ac_no):
+        return int(ac_no) in self.groups
+
+    def acs(self):
+        return sorted(self.groups)
+
+    def read(self, ac_no, columns=None):
+        """Booth rows for one AC (empty frame if the AC isn't stored)."""
+        groups = self.groups.get(int(ac_no), [])
+        if not groups:
+            return self.file.schema_arrow.empty_table().to_pandas()
+        mixed = self._mixed.intersection(groups)
+        cols  = None if columns is None or not mixed else list(dict.fromkeys(["ac_no", *columns]))
+        with self._lock:
+            table = self.file.read_row_groups(groups, columns=cols or columns)
+        if mixed:
+            # chunks shared with other ACs (files not written by ingest)
+            table = table.filter(pc.equal(table.column("ac_no"), int(ac_no)))
+            if columns is not None:
+                table = table.select(columns)
+        return table.to_pandas()
+
+
+def open_store(root, state, year, election="general"):
+    """``BoothStore`` for an election, or ``None`` when none was ingested."""
+    path = path_for(root, state, year, election)
+    return BoothStore(path) if path.is_file() else None
+
+
+def booth_summary(df):
+    """Booth × party vote table with the leading party per booth."""
+    if not {"booth_no", "party", "votes"} <= set(df):
+        return df
+    idx   = ["booth_no", "booth_name"] if "booth_name" in df else ["booth_no"]
+    wide  = df.pivot_table(index=idx, columns="party", values="votes",
+                           aggfunc="sum", fill_value=0, observed=True)
+    wide  = wide[wide.sum().sort_values(ascending=False).index]
+    votes = wide.to_numpy()
+    out   = wide.set_axis(wide.columns.astype(str), axis=1).rename_axis(columns=None)
+    if votes.shape[1]:
+        out["Leading"] = wide.columns.to_numpy()[votes.argmax(axis=1)]
+    if votes.shape[1] > 1:
+        top = np.sort(votes, axis=1)
+        out["Margin"] = top[:, -1] - top[:, -2]
+    return out.reset_index()
+
+
+if __name__ == "__main__":
+    root = Path(os.environ.get("WB_BOOTHS", Path(__file__).parent / "booths"))
+    cmd, *args = sys.argv[1:]
+    if cmd == "ingest":
+        src, state, year, *rest = args
+        path = ingest(root, pd.read_csv(src), state, int(year), *rest)
+        meta = pq.read_metadata(path)
+        print(f"{meta.num_rows} rows in {meta.num_row_groups} ACs -> {path}")
+    elif cmd == "show":
+        state, year, ac = args
+        print(booth_summary(open_store(root, state, int(year)).read(int(ac))).to_string())
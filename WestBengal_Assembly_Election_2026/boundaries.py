@@ -0,0 +1,419 @@
+# ── Constituency boundaries ───────────────────────────────────────────────────
+# Streaming KML reader for the AC boundary file.  Placemarks are parsed one at a
+# time with iterparse and detached from the tree as soon as they are consumed,
+# so memory use does not grow with the size of the KML.  Each <coordinates>
+# block is decoded in a single NumPy call instead of per-point split/float.
+#
+# ``simplify_levels`` derives one pre-simplified copy of the geometry per map
+# zoom.  Rings are cut into arcs at junction vertices (where three or more
+# edges meet) and each arc is simplified once, so boundaries shared by two
+# ACs stay identical in both and neighbours never gap or overlap.
+#
+# Parsed boundaries can be frozen into a single binary artifact (flat
+# coordinate arrays + ring/polygon/feature offsets + properties + per-district
+# bounding boxes + simplified levels) that is memory-mapped on start-up
+# instead of re-parsing KML:
+#
+#   python boundaries.py wb_acs_map.kml [wb_acs_map.bin] [7-11]
+import io, os, json, hashlib
+import xml.etree.ElementTree as ET
+import numpy as np
+
+from util import atomic_path
+
+
+def _local(tag):
+    return tag.rpartition("}")[2]
+
+
+def decode_coords(text):
+    """Decode a KML coordinate block into an (n, 2) float array of lon/lat."""
+    tuples = text.split()
+    if not tuples:
+        return np.empty((0, 2))
+    try:
+        return np.loadtxt(tuples, delimiter=",", usecols=(0, 1), ndmin=2)
+    except ValueError:
+        pass
+    # Ragged tuples (mixed 2D/3D points) — decode tuple by tuple.
+    pts = [p.split(",")[:2] for p in tuples]
+    return np.array([p for p in pts if len(p) == 2], dtype=float).reshape(-1, 2)
+
+
+def _polygon(pg):
+    outer, inner = None, []
+    for boundary in pg:
+        kind = _local(boundary.tag)
+        if kind not in ("outerBoundaryIs", "innerBoundaryIs"):
+            continue
+        for el in boundary.iter():
+            if _local(el.tag) != "coordinates" or not el.text:
+                continue
+            ring = decode_coords(el.text)
+            if len(ring) < 3:
+                continue
+            if kind == "outerBoundaryIs":
+                outer = ring
+            else:
+                inner.append(ring)
+    return None if outer is None else [outer] + inner
+
+
+def _placemark(pm):
+    props, polygons = {}, []
+    for el in pm.iter():
+        kind = _local(el.tag)
+        if kind == "SimpleData":
+            props[el.get("name")] = el.text
+        elif kind == "Polygon":
+            rings = _polygon(el)
+            if rings is not None:
+                polygons.append(rings)
+    return props, polygons
+
+
+def iter_placemarks(source):
+    """Yield ``(properties, polygons)`` for every polygonal Placemark in a KML.
+
+    ``source`` is a path or a binary file object.  ``polygons`` is a list of
+    polygons (several for a MultiGeometry), each a list of rings whose first
+    element is the outer ring, as (n, 2) arrays.
+    """
+    stack = []
+    for event, el in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(el)
+            continue
+        stack.pop()
+        if _local(el.tag) != "Placemark":
+            continue
+        props, polygons = _placemark(el)
+        el.clear()
+        if stack:
+            stack[-1].remove(el)
+        if polygons:
+            yield props, polygons
+
+
+def iter_kml_features(source):
+    """Yield Polygon/MultiPolygon features lazily from a KML source.
+
+    Rings stay as NumPy arrays (cheap to cache and to measure); use
+    ``as_geojson`` before handing a feature to a JSON serializer.
+    """
+    for props, polygons in iter_placemarks(source):
+        yield {"type": "Feature", "properties": props, "geometry": _geometry(polygons)}
+
+
+def as_geojson(feature, properties=None, geometry=None):
+    """Copy of ``feature`` with plain-list coordinates, ready for json.dumps.
+
+    ``properties``/``geometry`` replace the feature's own when given (e.g. a
+    simplified level from ``simplify_levels``).
+    """
+    g = feature["geometry"] if geometry is None else geometry
+    if g["type"] == "MultiPolygon":
+        coords = [[np.asarray(r).tolist() for r in pg] for pg in g["coordinates"]]
+    else:
+        coords = [np.asarray(r).tolist() for r in g["coordinates"]]
+    return {"type": "Feature",
+            "properties": feature["properties"] if properties is None else properties,
+            "geometry": {"type": g["type"], "coordinates": coords}}
+
+
+def _geometry(polygons):
+    if len(polygons) == 1:
+        return {"type": "Polygon", "coordinates": polygons[0]}
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def _polygons(geometry):
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return [geometry["coordinates"]]
+
+
+def outer_rings(geometry):
+    """Outer rings of a Polygon or MultiPolygon geometry."""
+    return [pg[0] for pg in _polygons(geometry)]
+
+
+def district_bounds(geojson):
+    """``{dist_name: [[south, west], [north, east]]}`` over all features."""
+    if "district_bounds" in geojson:
+        return geojson["district_bounds"]
+    bounds = {}
+    for f in geojson["features"]:
+        dist   = f["properties"].get("dist_name", "Unknown")
+        coords = np.concatenate([np.asarray(r) for r in outer_rings(f["geometry"])])
+        lo, hi = coords.min(axis=0), coords.max(axis=0)
+        if dist not in bounds:
+            bounds[dist] = [float(lo[1]), float(lo[0]), float(hi[1]), float(hi[0])]
+        else:
+            b = bounds[dist]
+            bounds[dist] = [min(b[0],float(lo[1])), min(b[1],float(lo[0])),
+                            max(b[2],float(hi[1])), max(b[3],float(hi[0]))]
+    return {d: [[v[0],v[1]],[v[2],v[3]]] for d,v in bounds.items()}
+
+
+# ── Topology-preserving simplification ────────────────────────────────────────
+def zoom_tolerance(zoom, px=0.5, lat=23.4):
+    """Simplification tolerance in degrees: ``px`` screen pixels at ``zoom``."""
+    return px * 360 / (256 * 2 ** zoom) * np.cos(np.radians(lat))
+
+
+def _dp_importance(pts, starts, floor):
+    # Douglas–Peucker over many arcs at once (arc k is pts[starts[k]:starts[k+1]]),
+    # run a single time down to ``floor``.  Each kept vertex records the
+    # largest tolerance at which it survives, so every level is just a mask.
+    # All pending segments are split together, one recursion depth per round.
+    # The first split point of an arc is always kept so it never collapses
+    # to a chord.
+    imp = np.zeros(len(pts))
+    imp[starts[:-1]] = imp[starts[1:] - 1] = np.inf
+    i   = starts[:-1].copy()
+    j   = starts[1:] - 1
+    cap = np.full(len(i), np.inf)
+    first = np.ones(len(i), dtype=bool)
+    while True:
+        keep = j - i >= 2
+        i, j, cap, first = i[keep], j[keep], cap[keep], first[keep]
+        if not len(i):
+            return imp
+        n    = j - i - 1
+        off  = np.concatenate([[0], np.cumsum(n)[:-1]])
+        seg  = np.repeat(np.arange(len(i)), n)
+        idx  = i[seg] + np.arange(n.sum()) - off[seg] + 1
+        a, d = pts[i][seg], (pts[j] - pts[i])[seg]
+        rel  = pts[idx] - a
+        norm = np.hypot(d[:, 0], d[:, 1])
+        dist = np.where(norm > 0,
+                        np.abs(d[:, 0] * rel[:, 1] - d[:, 1] * rel[:, 0]) / np.where(norm > 0, norm, 1),
+                        np.hypot(rel[:, 0], rel[:, 1]))
+        dmax = np.maximum.reduceat(dist, off)
+        # first index reaching the segment maximum
+        hit  = np.flatnonzero(dist == dmax[seg])
+        k    = idx[hit[np.unique(seg[hit], return_index=True)[1]]]
+        split = first | (dmax >= floor)
+        i, j, k, cap, first, dmax = i[split], j[split], k[split], cap[split], first[split], dmax[split]
+        imp[k] = np.where(first, np.inf, np.minimum(dmax, cap))
+        i, j  = np.r_[i, k], np.r_[k, j]
+        cap   = np.r_[imp[k], imp[k]]
+        first = np.zeros(len(i), dtype=bool)
+
+
+def _canonical(ids):
+    # Orientation shared by both rings that use an arc
+    if ids[0] != ids[-1]:
+        return ids[0] > ids[-1]
+    return len(ids) > 2 and ids[1] > ids[-2]
+
+
+def simplify_levels(features, tolerances, decimals=5):
+    """Simplified geometries per level, aligned with ``features``.
+
+    ``tolerances`` maps a level key (e.g. a zoom) to a tolerance in degrees.
+    Returns ``{level: [geometry, ...]}``; coordinates are rounded to
+    ``decimals`` places to keep the serialized payload small.
+    """
+    rings = [np.asarray(r, dtype=np.float64)
+             for f in features for pg in _polygons(f["geometry"]) for r in pg]
+    if not rings:
+        return {lvl: [] for lvl in tolerances}
+
+    # Vertex ids: identical coordinates (to 1e-7°) share an id across rings.
+    q     = np.round(np.concatenate(rings) * 1e7).astype(np.int64)
+    q    -= q.min(axis=0)
+    _, vid = np.unique(q[:, 0] * (q[:, 1].max() + 1) + q[:, 1], return_inverse=True)
+    bounds = np.concatenate([[0], np.cumsum([len(r) for r in rings])])
+    ids    = [vid[bounds[k]:bounds[k + 1]] for k in range(len(rings))]
+
+    # Junctions: vertices with more than two distinct neighbours.
+    u = np.concatenate([r[:-1] for r in ids])
+    v = np.concatenate([r[1:] for r in ids])
+    lo, hi = np.minimum(u, v)[u != v], np.maximum(u, v)[u != v]
+    e = np.unique(lo * (vid.max() + 1) + hi)
+    junction = np.bincount(np.r_[e // (vid.max() + 1), e % (vid.max() + 1)],
+                           minlength=vid.max() + 1) > 2
+
+    # Cut rings into arcs; an arc shared by two rings is stored once, in the
+    # orientation given by _canonical, and simplified once.
+    arcs, arc_pts, ring_arcs = {}, [], []
+    for pts, rid in zip(rings, ids):
+        if len(pts) < 4 or rid[0] != rid[-1]:
+            ring_arcs.append(None)
+            continue
+        open_ = rid[:-1]
+        cuts  = np.flatnonzero(junction[open_])
+        if len(cuts) == 0:
+            # Free-standing ring: start at its smallest vertex id, and cut it
+            # again at the farthest vertex so both halves are open arcs.
+            start = int(open_.argmin())
+            far   = np.hypot(*(pts[:-1] - pts[start]).T)
+            cuts  = np.unique([start, int(far.argmax())])
+        order = np.r_[np.arange(cuts[0], len(open_)), np.arange(0, cuts[0] + 1)]
+        rel   = np.r_[cuts - cuts[0], len(open_)]
+        refs  = []
+        for a, b in zip(rel[:-1], rel[1:]):
+            arc_ids = rid[order[a:b + 1]]
+            rev     = _canonical(arc_ids)
+            key     = (len(arc_ids),) + tuple(arc_ids[[0, 1, -2, -1]][::-1 if rev else 1])
+            if key not in arcs:
+                arcs[key] = len(arc_pts)
+                arc = pts[order[a:b + 1]]
+                arc_pts.append(arc[::-1] if rev else arc)
+            refs.append((a, b, arcs[key], rev))
+        ring_arcs.append((order, refs))
+
+    starts = np.concatenate([[0], np.cumsum([len(a) for a in arc_pts])])
+    imp    = _dp_importance(np.concatenate(arc_pts), starts, min(tolerances.values()))
+    imps   = []
+    for pts, ra in zip(rings, ring_arcs):
+        if ra is None:
+            imps.append(np.full(len(pts), np.inf))
+            continue
+        order, refs = ra
+        ring_imp = np.empty(len(pts))
+        for a, b, k, rev in refs:
+            arc_imp = imp[starts[k]:starts[k + 1]]
+            ring_imp[order[a:b + 1]] = arc_imp[::-1] if rev else arc_imp
+        ring_imp[-1] = ring_imp[0]
+        imps.append(ring_imp)
+
+    levels = {}
+    for lvl, tol in tolerances.items():
+        it, geoms = iter(zip(rings, imps)), []
+        for f in features:
+            polys = []
+            for pg in _polygons(f["geometry"]):
+                kept = [np.round(r[k >= tol], decimals) for r, k in (next(it) for _ in pg)]
+                kept = [kept[0]] + [r for r in kept[1:] if len(r) >= 4]
+                polys.append(kept)
+            geoms.append(_geometry(polys))
+        levels[lvl] = geoms
+    return levels
+
+
+# ── Binary boundary cache ─────────────────────────────────────────────────────
+# Layout: MAGIC | u64 header length | JSON header | arrays, each 64-byte aligned.
+# The header records dtype/shape/offset of every array plus the metadata.
+# Simplified levels are stored as further coordinate/offset array sets,
+# prefixed with the level key ("9/coords", "9/rings", ...).
+CACHE_MAGIC   = b"WBBND\x00\x00\x02"
+CACHE_ALIGN   = 64
+
+
+def source_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def _flatten(geometries, prefix=""):
+    rings, ring_len, poly_rings, feat_polys = [], [], [], []
+    for g in geometries:
+        polygons = _polygons(g)
+        feat_polys.append(len(polygons))
+        for pg in polygons:
+            poly_rings.append(len(pg))
+            for r in pg:
+                rings.append(np.asarray(r, dtype=np.float64))
+                ring_len.append(len(r))
+    offsets = lambda n: np.concatenate([[0], np.cumsum(n, dtype=np.int64)])
+    coords  = np.concatenate(rings) if rings else np.empty((0, 2))
+    return {prefix + "coords": coords, prefix + "rings": offsets(ring_len),
+            prefix + "polys": offsets(poly_rings), prefix + "feats": offsets(feat_polys)}
+
+
+def _unflatten(a, n, prefix=""):
+    coords, rings = a[prefix + "coords"], a[prefix + "rings"]
+    polys,  feats = a[prefix + "polys"],  a[prefix + "feats"]
+    return [_geometry([[coords[rings[r]:rings[r + 1]] for r in range(polys[p], polys[p + 1])]
+                       for p in range(feats[i], feats[i + 1])])
+            for i in range(n)]
+
+
+def write_cache(path, geojson, **meta):
+    """Write ``geojson`` (as returned by ``iter_kml_features``) to ``path``.
+
+    A ``levels`` entry (from ``simplify_levels``) is stored alongside the full
+    geometry.  Extra keyword arguments (e.g. ``sha256``, ``etag``) are stored
+    in the header and returned by ``read_cache_meta``.
+    """
+    features = geojson["features"]
+    levels   = geojson.get("levels", {})
+    arrays   = _flatten(f["geometry"] for f in features)
+    for lvl, geoms in levels.items():
+        arrays.update(_flatten(geoms, f"{lvl}/"))
+    meta = dict(meta,
+                properties=[f["properties"] for f in features],
+                district_bounds=district_bounds(geojson),
+                levels=list(levels))
+
+    layout, pos = {}, 0
+    for name, a in arrays.items():
+        layout[name] = [a.dtype.str, list(a.shape), pos]
+        pos += -(-a.nbytes // CACHE_ALIGN) * CACHE_ALIGN
+    header = json.dumps({"meta": meta, "arrays": layout}).encode()
+    start  = -(-(len(CACHE_MAGIC) + 8 + len(header)) // CACHE_ALIGN) * CACHE_ALIGN
+
+    with atomic_path(path) as tmp, open(tmp, "wb") as fh:
+        fh.write(CACHE_MAGIC)
+        fh.write(len(header).to_bytes(8, "little"))
+        fh.write(header)
+        for name, a in arrays.items():
+            fh.seek(start + layout[name][2])
+            fh.write(np.ascontiguousarray(a).tobytes())
+        fh.truncate(start + pos)
+
+
+def _read_header(fh):
+    if fh.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+        raise ValueError("not a boundary cache file")
+    n = int.from_bytes(fh.read(8), "little")
+    header = json.loads(fh.read(n))
+    start  = -(-(len(CACHE_MAGIC) + 8 + n) // CACHE_ALIGN) * CACHE_ALIGN
+    return header, start
+
+
+def read_cache_meta(path):
+    """Header metadata of a cache file, or ``None`` if missing/unreadable."""
+    try:
+        with open(path, "rb") as fh:
+            return _read_header(fh)[0]["meta"]
+    except (OSError, ValueError):
+        return None
+
+
+def read_cache(path):
+    """Memory-map a cache file back into a FeatureCollection.
+
+    Ring arrays are read-only views into the mapped file, so nothing is
+    copied until a ring is actually touched.
+    """
+    with open(path, "rb") as fh:
+        header, start = _read_header(fh)
+    a = {name: np.memmap(path, dtype=dt, mode="r", shape=tuple(shape), offset=start + off)
+         if shape[0] else np.empty(shape, dtype=dt)
+         for name, (dt, shape, off) in header["arrays"].items()}
+    meta  = header["meta"]
+    n     = len(meta["properties"])
+    geoms = _unflatten(a, n)
+    return {"type": "FeatureCollection",
+            "features": [{"type": "Feature", "properties": p, "geometry": g}
+                         for p, g in zip(meta["properties"], geoms)],
+            "district_bounds": meta["district_bounds"],
+            "sha256": meta.get("sha256"),
+            "levels": {lvl: _unflatten(a, n, f"{lvl}/") for lvl in meta["levels"]}}
+
+
+if __name__ == "__main__":
+    import sys
+    src = sys.argv[1]
+    dst = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(src)[0] + ".bin"
+    lo, hi = map(int, (sys.argv[3] if len(sys.argv) > 3 else "7-11").split("-"))
+    with open(src, "rb") as fh:
+        content = fh.read()
+    features = list(iter_kml_features(io.BytesIO(content)))
+    geojson  = {"type": "FeatureCollection", "features": features,
+                "levels": simplify_levels(features, {z: zoom_tolerance(z) for z in range(lo, hi + 1)})}
+    write_cache(dst, geojson, sha256=source_hash(content))
+    print(f"{len(features)} features -> {dst} ({os.path.getsize(dst)/1e6:.1f} MB)")
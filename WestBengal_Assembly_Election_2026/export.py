@@ -0,0 +1,150 @@
+# ── Static export ─────────────────────────────────────────────────────────────
+# Pre-renders every (district, party) view of the map to plain HTML so it can
+# be served from a CDN with no Python behind it:
+#
+#   <out>/tiles/<version>/{z}/{x}/{y}.pbf   boundaries, shared by every view
+#   <out>/views/<district>--<party>.html   one page per filter combination
+#   <out>/manifest.json                    input/output hashes per view
+#
+# Pages are built with the dashboard's own load_data / load_geojson /
+# build_map, in tile mode, so they carry only the per-AC results and fetch the
+# geometry from the shared tile set.  Each view's input hash covers the rows
+# it shows, the boundary version and the renderer source; a later run only
+# re-renders views whose hash changed and re-cuts tiles only for new
+# boundaries.  Views render in parallel in a process pool.
+#
+#   python export.py site/ [--csv election_data.csv] [--workers 8] [--force]
+import argparse, hashlib, json, re, shutil, sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pandas as pd
+
+from util import atomic_path, import_app
+
+HERE     = Path(__file__).parent
+RENDERER = ("app.py", "boundaries.py", "tiles.py", "export.py")
+
+
+def _slug(s):
+    return re.sub(r"[^a-z0-9]+", "-", str(s).lower()).strip("-")
+
+
+def view_name(district, party):
+    return f"{_slug(district)}--{_slug(party)}.html"
+
+
+def renderer_hash():
+    h = hashlib.sha256()
+    for name in RENDERER:
+        h.update((HERE / name).read_bytes())
+    return h.hexdigest()[:12]
+
+
+def view_hash(df, district, party, *salt):
+    """Hash of everything a view's page is built from."""
+    rows = df if district == "All Districts" else df[df["District"] == district]
+    h    = hashlib.sha256(json.dumps([district, party, *salt]).encode())
+    h.update(pd.util.hash_pandas_object(rows, index=False).values.tobytes())
+    return h.hexdigest()[:16]
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_path(path) as tmp:
+        tmp.write_bytes(data)
+
+
+# ── Geometry ──────────────────────────────────────────────────────────────────
+def export_tiles(out, geojson, zooms):
+    """Cut the tile set into ``out/tiles/<version>``; returns the version."""
+    from tiles import cut_tiles
+    tiles   = sorted(cut_tiles(geojson, zooms))
+    h       = hashlib.sha256()
+    for z, x, y, data in tiles:
+        h.update(f"{z}/{x}/{y}".encode())
+        h.update(data)
+    version = h.hexdigest()[:12]
+    root    = out / "tiles" / version
+    if not root.is_dir():
+        for z, x, y, data in tiles:
+            _write(root / str(z) / str(x) / f"{y}.pbf", data)
+    return version, len(tiles)
+
+
+# ── Views (run in worker processes) ───────────────────────────────────────────
+_state = {}
+
+
+def _init(df, geojson, tiles_url, out):
+    _state.update(app=import_app(), df=df, geojson=geojson, tiles_url=tiles_url, out=out)
+
+
+def _render(view):
+    district, party = view
+    app, df, geojson = _state["app"], _state["df"], _state["geojson"]
+    html = app.render_map(df, geojson, app.data_version(df, geojson),
+                          district, party, _state["tiles_url"]).encode()
+    _write(_state["out"] / "views" / view_name(district, party), html)
+    return hashlib.sha256(html).hexdigest()[:16], len(html)
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+def export(out, src=None, workers=None, force=False):
+    app     = import_app()
+    out     = Path(out)
+    geojson = app.load_geojson()
+    df      = app.join_districts(app.load_data(src or app.CSV_URL), geojson)
+    try:
+        old = json.loads((out / "manifest.json").read_text())
+    except (OSError, ValueError):
+        old = {}
+
+    zooms = list(range(app.MIN_ZOOM, app.MAX_ZOOM + 1))
+    geo   = old.get("geometry", {})
+    if force or geo.get("source") != geojson.get("sha256") \
+            or not (out / "tiles" / str(geo.get("version"))).is_dir():
+        version, n_tiles = export_tiles(out, geojson, zooms)
+        geo = {"source": geojson.get("sha256"), "version": version, "tiles": n_tiles}
+        for stale in (out / "tiles").iterdir():
+            if stale.name != version:
+                shutil.rmtree(stale, ignore_errors=True)
+    # views/<page>.html → tiles/<version>/...
+    tiles_url = f"../tiles/{geo['version']}/{{z}}/{{x}}/{{y}}.pbf"
+
+    salt  = (renderer_hash(), geo["version"])
+    views = [("All Districts", p) for p in app.PARTY_FILTERS] \
+          + [(d, p) for d in sorted(app.district_bounds(geojson)) for p in app.PARTY_FILTERS]
+    done  = old.get("views", {})
+    want  = {view_name(*v): (v, view_hash(df, *v, *salt)) for v in views}
+    todo  = [v for name, (v, key) in want.items()
+             if force or done.get(name, {}).get("input") != key
+             or not (out / "views" / name).is_file()]
+
+    results = {}
+    if todo:
+        with ProcessPoolExecutor(workers, initializer=_init,
+                                 initargs=(df, geojson, tiles_url, out)) as pool:
+            results = dict(zip(map(lambda v: view_name(*v), todo), pool.map(_render, todo)))
+    views_out = {}
+    for name, ((district, party), key) in want.items():
+        sha, size = results.get(name) or (done[name]["sha256"], done[name]["bytes"])
+        views_out[name] = {"district": district, "party": party,
+                           "input": key, "sha256": sha, "bytes": size}
+    for name in set(done) - set(want):
+        (out / "views" / name).unlink(missing_ok=True)
+
+    manifest = {"results": df.attrs.get("version"), "renderer": salt[0],
+                "geometry": geo, "views": views_out}
+    _write(out / "manifest.json", json.dumps(manifest, indent=1).encode())
+    return len(todo), len(want)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Pre-render every map view to static files.")
+    ap.add_argument("out", type=Path)
+    ap.add_argument("--csv", help="results CSV path or URL (default: the GitHub CSV)")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--force", action="store_true", help="re-render everything")
+    args = ap.parse_args()
+    rendered, total = export(args.out, args.csv, args.workers, args.force)
+    print(f"{rendered}/{total} views rendered -> {args.out}", file=sys.stderr)
@@ -0,0 +1,161 @@
+# ── Election history store ────────────────────────────────────────────────────
+# AC-level results for any number of elections, normalised to one schema and
+# kept as a hive-partitioned Parquet dataset:
+#
+#   <root>/state=WB/year=2021/general.parquet
+#   <root>/state=WB/year=2024/bye-2024-07.parquet
+#
+# Rows are keyed by (state, year, ac_no); the file name is the election within
+# that year (general, or a bye-election tag).  Reads go through pyarrow.dataset
+# with a filter on the partition keys and an explicit column list, so other
+# states and years are skipped by path and only the needed columns decoded.
+#
+#   python history.py ingest election_data.csv WB 2026 [general]
+#   python history.py swing WB 2021 2026
+import os, sys
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from util import atomic_path
+
+# dashboard CSV column → store column
+CSV_COLUMNS = {
+    "Const. No.":         "ac_no",
+    "Constituency":       "ac_name",
+    "Leading Candidate":  "winner",
+    "Leading Party":      "winner_party",
+    "Trailing Candidate": "runner_up",
+    "Trailing Party":     "runner_up_party",
+    "Margin":             "margin",
+    "Round":              "round",
+    "Status":             "status",
+}
+SCHEMA = pa.schema([
+    ("election",        pa.string()),
+    ("ac_no",           pa.int32()),
+    ("ac_name",         pa.string()),
+    ("winner",          pa.string()),
+    ("winner_party",    pa.string()),
+    ("runner_up",       pa.string()),
+    ("runner_up_party", pa.string()),
+    ("margin",          pa.float64()),
+    ("round",           pa.string()),
+    ("status",          pa.string()),
+])
+
+
+def normalize(df, election="general", columns=CSV_COLUMNS):
+    """Map a results frame onto SCHEMA; ``columns`` renames source columns."""
+    out = df.rename(columns=columns)
+    out["election"] = election
+    out["ac_no"]    = pd.to_numeric(out["ac_no"], errors="coerce")
+    out["margin"]   = pd.to_numeric(out["margin"].astype(str).str.replace(",", ""), errors="coerce")
+    out = out.dropna(subset=["ac_no"]).drop_duplicates("ac_no", keep="last")
+    for name in SCHEMA.names:
+        if name not in out:
+            out[name] = None
+    return pa.Table.from_pandas(out[SCHEMA.names], schema=SCHEMA, preserve_index=False) \
+             .sort_by("ac_no")
+
+
+def ingest(root, df, state, year, election="general", columns=CSV_COLUMNS):
+    """Write (or replace) one election's partition file; returns its path."""
+    table = normalize(df, election, columns)
+    path  = Path(root) / f"state={state}" / f"year={int(year)}" / f"{election}.parquet"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_path(path) as tmp:      # dot-named: skipped by readers
+        pq.write_table(table, tmp, compression="zstd")
+    return path
+
+
+def _dataset(root):
+    return ds.dataset(root, format="parquet", partitioning="hive",
+                      exclude_invalid_files=True)
+
+
+def elections(root, state):
+    """``[(year, election), ...]`` stored for ``state``, newest first.
+
+    Answered from the file layout alone; no Parquet file is opened.
+    """
+    if not Path(root).is_dir():
+        return []
+    out = []
+    for frag in _dataset(root).get_fragments(filter=ds.field("state") == state):
+        keys = ds.get_partition_keys(frag.partition_expression)
+        out.append((int(keys["year"]), Path(frag.path).stem))
+    return sorted(set(out), key=lambda k: (-k[0], k[1] != "general", k[1]))
+
+
+def read(root, state, years, election="general", columns=None):
+    """Results for ``state`` in ``years`` (an int or a list) as a DataFrame.
+
+    ``columns`` limits the decoded columns; ``year`` is always included.
+    """
+    years = [years] if isinstance(years, int) else list(years)
+    cols  = None if columns is None else ["year", *[c for c in columns if c != "year"]]
+    table = _dataset(root).to_table(
+        columns=cols,
+        filter=(ds.field("state") == state) & ds.field("year").isin(years)
+               & (ds.field("election") == election))
+    return table.to_pandas()
+
+
+def read_csv_frame(root, state, year, election="general", columns=None):
+    """One election in the dashboard's CSV column layout."""
+    back = {v: k for k, v in CSV_COLUMNS.items()}
+    want = None if columns is None else [CSV_COLUMNS[c] for c in columns]
+    df   = read(root, state, year, election, want).drop(columns="year")
+    return df.rename(columns=back)[[back[c] for c in (want or CSV_COLUMNS.values())]]
+
+
+def swing(root, state, base, target, election="general"):
+    """Per-AC comparison of two elections.
+
+    Returns a frame indexed by ac_no with the name, winning party and margin
+    in both years, and ``flipped`` where the winning party changed.  ACs that
+    exist in only one of the two years (delimitation) keep NaNs on the other
+    side and are never counted as flips.
+    """
+    df   = read(root, state, [base, target], election,
+                columns=["ac_no", "ac_name", "winner_party", "margin"])
+    cols = ["ac_name", "winner_party", "margin"]
+    a    = df[df["year"] == base].set_index("ac_no")[cols]
+    b    = df[df["year"] == target].set_index("ac_no")[cols]
+    out  = a.join(b, how="outer", lsuffix="_base", rsuffix="_target").sort_index()
+    out  = pd.DataFrame({
+        "ac_name":       out["ac_name_target"].fillna(out["ac_name_base"]),
+        "party_base":    out["winner_party_base"],
+        "party_target":  out["winner_party_target"],
+        "margin_base":   out["margin_base"],
+        "margin_target": out["margin_target"],
+    })
+    out["flipped"] = out["party_base"].notna() & out["party_target"].notna() \
+                     & (out["party_base"] != out["party_target"])
+    return out
+
+
+def seat_change(sw):
+    """Seats per party in both years of a ``swing`` frame, with the change."""
+    seats = pd.DataFrame({"base":   sw["party_base"].value_counts(),
+                          "target": sw["party_target"].value_counts()}).fillna(0).astype(int)
+    seats["change"] = seats["target"] - seats["base"]
+    return seats.sort_values("target", ascending=False)
+
+
+if __name__ == "__main__":
+    root = Path(os.environ.get("WB_HISTORY", Path(__file__).parent / "history"))
+    cmd, *args = sys.argv[1:]
+    if cmd == "ingest":
+        src, state, year, *rest = args
+        path = ingest(root, pd.read_csv(src), state, int(year), *rest)
+        print(f"{pq.read_metadata(path).num_rows} rows -> {path}")
+    elif cmd == "swing":
+        state, base, target = args
+        sw = swing(root, state, int(base), int(target))
+        print(seat_change(sw).to_string())
+        print(f"\n{int(sw['flipped'].sum())} flips")
+        print(sw[sw["flipped"]][["ac_name", "party_base", "party_target"]].to_string())
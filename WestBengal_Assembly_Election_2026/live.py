@@ -0,0 +1,139 @@
+# ── Live results ──────────────────────────────────────────────────────────────
+# Polls the results CSV with conditional requests (ETag / If-Modified-Since)
+# and folds each new snapshot into the frame it already holds.  Rows are
+# matched on "Const. No." by a per-row hash; only constituencies that were
+# added or whose columns changed go through ``prepare`` again, the rest of the
+# prepared frame is reused as is.  Every applied snapshot gets a new version,
+# and the keys it touched are kept so callers can ask what moved since a
+# version they have already shown.
+import io, time, hashlib, threading
+import numpy as np
+import pandas as pd
+import requests
+
+KEY = "Const. No."
+
+
+def frame_version(df):
+    return _version(pd.util.hash_pandas_object(df, index=False).values)
+
+
+def _version(row_hashes):
+    return hashlib.sha256(np.ascontiguousarray(row_hashes)).hexdigest()[:12]
+
+
+class ResultsFeed:
+    """Incrementally updated results frame for one CSV URL.
+
+    ``prepare`` turns raw CSV rows into the frame the app works on (derived
+    columns included) and must work row by row, so it can be applied to just
+    the rows that changed.
+    """
+
+    def __init__(self, url, prepare, interval=60, session=None, history=256):
+        self.url      = url
+        self.prepare  = prepare
+        self.interval = interval
+        self.session  = session or requests.Session()
+        self.etag     = None
+        self.modified = None
+        self.frame    = None
+        self.version  = None
+        self._hashes  = None    # row hash per key of the last applied snapshot
+        self._changes = []      # [(version, keys changed to reach it)], oldest first
+        self._history = history
+        self._checked = float("-inf")
+        self._lock    = threading.Lock()
+
+    # ── Polling ───────────────────────────────────────────────────────────────
+    def poll(self):
+        """Fetch the CSV if it changed upstream and apply it.
+
+        Returns the set of Const. Nos. that changed (empty when the server
+        answered 304 or the content was identical).
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.modified:
+            headers["If-Modified-Since"] = self.modified
+        r = self.session.get(self.url, headers=headers, timeout=30)
+        self._checked = time.monotonic()
+        if r.status_code == 304 and self.frame is not None:
+            return set()
+        r.raise_for_status()
+        self.etag     = r.headers.get("ETag")
+        self.modified = r.headers.get("Last-Modified")
+        return self.apply(pd.read_csv(io.BytesIO(r.content)))
+
+    def poll_if_due(self):
+        """Poll when ``interval`` seconds have passed since the last check.
+
+        Only one caller polls at a time; the others keep the current frame.
+        A failed request keeps the last good frame once there is one.
+        """
+        if self.frame is not None and time.monotonic() - self._checked < self.interval:
+            return set()
+        if not self._lock.acquire(blocking=self.frame is None):
+            return set()
+        try:
+            return self.poll()
+        except (requests.RequestException, ValueError):
+            if self.frame is None:
+                raise
+            self._checked = time.monotonic()
+            return set()
+        finally:
+            self._lock.release()
+
+    # ── Diffing ───────────────────────────────────────────────────────────────
+    def apply(self, raw):
+        """Fold a raw snapshot into the frame; return the changed Const. Nos."""
+        keys   = pd.to_numeric(raw[KEY], errors="coerce")
+        hashes = pd.Series(pd.util.hash_pandas_object(raw, index=False).values, index=keys)
+        if self.frame is not None and hashes.equals(self._hashes):
+            return set()
+
+        if self.frame is None or keys.isna().any() or keys.duplicated().any():
+            # first snapshot, or keys we can't match rows on: prepare it all
+            frame   = self.prepare(raw.copy())
+            changed = set(keys.dropna())
+            if self._hashes is not None:
+                changed |= set(self._hashes.index)
+        else:
+            old     = self._hashes
+            moved   = ~hashes.index.isin(old.index) \
+                      | (hashes != old.reindex(hashes.index)).values
+            removed = old.index.difference(hashes.index)
+            changed = set(hashes.index[moved]) | set(removed)
+
+            prev  = self.frame.set_index(pd.to_numeric(self.frame[KEY], errors="coerce"))
+            fresh = self.prepare(raw[moved].copy().reset_index(drop=True))
+            fresh.index = keys[moved].values
+            frame = pd.concat([prev.drop(index=list(changed), errors="ignore"), fresh])
+            frame = frame.loc[keys.values].reset_index(drop=True)
+            for c in prev.columns[prev.dtypes == "category"]:
+                # concat falls back to object when the category sets differ
+                cats     = prev[c].cat.categories.union(fresh[c].cat.categories, sort=False)
+                frame[c] = pd.Categorical(frame[c], categories=cats, ordered=prev[c].cat.ordered)
+
+        version = _version(hashes.values)
+        frame.attrs["version"] = version
+        self.frame, self.version, self._hashes = frame, version, hashes
+        self._changes.append((version, frozenset(changed)))
+        del self._changes[:-self._history]
+        return changed
+
+    def changed_since(self, version):
+        """Const. Nos. changed after ``version`` was current.
+
+        ``None`` when the version is unknown (never seen, or older than the
+        kept history), meaning the caller should treat everything as changed.
+        """
+        seen = [v for v, _ in self._changes]
+        if version not in seen:
+            return None
+        out = set()
+        for _, keys in self._changes[seen.index(version) + 1:]:
+            out |= keys
+        return out
@@ -0,0 +1,144 @@
+# ── Rerun profiling ───────────────────────────────────────────────────────────
+# Opt-in timings for one Streamlit rerun, switched on with WB_PROFILE=1 or
+# ?profile=1 in the URL.  ``stage(name)`` times a block, ``cache_data`` is
+# st.cache_data that also records hit/miss and the pickled size of the value
+# it returns.  ``panel()`` shows the rerun in the sidebar with JSON and Chrome
+# trace (chrome://tracing, Perfetto) downloads covering the last RUNS reruns.
+#
+# Spans are kept per script thread, so the map warm-up thread and other
+# sessions never write into a rerun they don't belong to; with profiling off
+# every hook is a single attribute lookup.
+import os, json, time, pickle, functools, threading
+from contextlib import contextmanager
+import streamlit as st
+
+RUNS   = 50
+_local = threading.local()
+
+
+def enabled():
+    if os.environ.get("WB_PROFILE") == "1":
+        return True
+    try:
+        return st.query_params.get("profile") == "1"
+    except Exception:
+        return False
+
+
+class _Run:
+    def __init__(self):
+        self.t0    = time.perf_counter()
+        self.wall  = time.time()
+        self.spans = []
+        self.stack = []
+
+
+def active():
+    """True while this rerun is being profiled (a single attribute lookup)."""
+    return getattr(_local, "run", None) is not None
+
+
+def begin():
+    """Start profiling this rerun if it is switched on."""
+    _local.run = _Run() if enabled() else None
+    return _local.run is not None
+
+
+@contextmanager
+def stage(name, **meta):
+    """Time a block; yields a dict whose keys are stored with the span."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        yield meta
+        return
+    span = dict(meta, name=name, depth=len(run.stack))
+    run.stack.append(span)
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        span["start_ms"] = (start - run.t0) * 1000
+        span["ms"]       = (time.perf_counter() - start) * 1000
+        run.stack.pop()
+        run.spans.append(span)
+
+
+def _payload(value):
+    if isinstance(value, (bytes, str)):
+        return len(value.encode() if isinstance(value, str) else value)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return None
+
+
+def cache_data(**kwargs):
+    """``st.cache_data`` with hit/miss and payload size recorded per call."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def compute(*args, **kw):
+            run = getattr(_local, "run", None)
+            if run is not None and run.stack:
+                run.stack[-1]["cache"] = "miss"
+            return fn(*args, **kw)
+
+        cached = st.cache_data(**kwargs)(compute)
+
+        @functools.wraps(fn)
+        def call(*args, **kw):
+            if getattr(_local, "run", None) is None:
+                return cached(*args, **kw)
+            with stage(fn.__name__, cache="hit") as span:
+                value = cached(*args, **kw)
+            span["bytes"] = _payload(value)     # measured outside the timed block
+            return value
+
+        call.clear = cached.clear
+        return call
+    return wrap
+
+
+# ── Output ────────────────────────────────────────────────────────────────────
+def _history(run):
+    runs = st.session_state.setdefault("_profile_runs", [])
+    runs.append({"wall": run.wall, "total_ms": (time.perf_counter() - run.t0) * 1000,
+                 "spans": sorted(run.spans, key=lambda s: s["start_ms"])})
+    del runs[:-RUNS]
+    return runs
+
+
+def chrome_trace(runs):
+    """Chrome trace-event JSON; each rerun is its own thread row."""
+    events = []
+    for i, r in enumerate(runs):
+        base = (r["wall"] - runs[0]["wall"]) * 1e6
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": i,
+                       "args": {"name": f"rerun {i}"}})
+        events.append({"name": "rerun", "ph": "X", "pid": 1, "tid": i,
+                       "ts": base, "dur": r["total_ms"] * 1000})
+        for s in r["spans"]:
+            events.append({"name": s["name"], "ph": "X", "pid": 1, "tid": i,
+                           "ts": base + s["start_ms"] * 1000, "dur": s["ms"] * 1000,
+                           "args": {k: v for k, v in s.items()
+                                    if k not in ("name", "start_ms", "ms", "depth")}})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def panel():
+    """Close this rerun's profile and show it in the sidebar."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return
+    _local.run = None
+    runs = _history(run)
+    last = runs[-1]
+    with st.sidebar.expander(f"⏱ Rerun profile — {last['total_ms']:.0f} ms", expanded=False):
+        st.dataframe([{"stage": "· " * s["depth"] + s["name"], "ms": round(s["ms"], 1),
+                       "cache": s.get("cache", ""), "bytes": s.get("bytes")}
+                      for s in last["spans"]],
+                     use_container_width=True, hide_index=True)
+        c1, c2 = st.columns(2)
+        c1.download_button("JSON", json.dumps(runs, default=str), "profile.json",
+                           "application/json")
+        c2.download_button("Trace", json.dumps(chrome_trace(runs), default=str),
+                           "profile.trace.json", "application/json")
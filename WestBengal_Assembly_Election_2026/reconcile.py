@@ -0,0 +1,185 @@
+# ── AC name reconciliation ────────────────────────────────────────────────────
+# Pairs boundary features (KML ac_name / ac_no) with result rows (ECI
+# Constituency / Const. No.).  Matching runs in passes, each only over what is
+# still unpaired:
+#
+#   number   ac_no == Const. No., when the boundaries carry AC numbers
+#   exact    normalised names are equal
+#   fuzzy    trigram index proposes candidates, edit-distance ratio decides;
+#            pairs are taken best-first so every row and feature is used once
+#   manual   rows marked "manual" in a previous mapping file override all of
+#            the above, so a reviewer's corrections survive recomputation
+#
+# The result is a flat table (one row per result row).  The dashboard only
+# reads the mapping CSV; ``python reconcile.py`` refreshes it for review,
+# merging by const_no so rows of other elections and manual fixes are kept.
+#
+#   python reconcile.py [--csv election_data.csv] [--year 2024 --election bye]
+import argparse
+from pathlib import Path
+from collections import defaultdict
+from difflib import SequenceMatcher
+import numpy as np
+import pandas as pd
+
+from util import atomic_path, import_app
+
+MIN_SCORE  = 0.75
+CANDIDATES = 5
+COLUMNS    = ["const_no", "constituency", "ac_name", "dist_name", "method", "score"]
+
+
+def name_key(names):
+    """Normalised match key: no (SC)/(ST), punctuation or spacing, upper case."""
+    return (pd.Series(names, dtype=object).astype(str)
+              .str.replace(r"\(\s*S[CT]\s*\)", "", regex=True)
+              .str.upper().str.replace(r"[^A-Z0-9]+", "", regex=True))
+
+
+def _grams(s, n=3):
+    s = f" {s} "
+    return {s[i:i + n] for i in range(len(s) - n + 1)}
+
+
+class NameIndex:
+    """Trigram inverted index over a list of keys."""
+
+    def __init__(self, keys):
+        self.keys     = list(keys)
+        self.postings = defaultdict(list)
+        for i, k in enumerate(self.keys):
+            for g in _grams(k):
+                self.postings[g].append(i)
+
+    def candidates(self, key, k=CANDIDATES):
+        hits = defaultdict(int)
+        for g in _grams(key):
+            for i in self.postings.get(g, ()):
+                hits[i] += 1
+        return sorted(hits, key=hits.get, reverse=True)[:k]
+
+    def best(self, key, k=CANDIDATES):
+        """``[(score, index), ...]`` for the top trigram candidates."""
+        return [(SequenceMatcher(None, key, self.keys[i]).ratio(), i)
+                for i in self.candidates(key, k)]
+
+
+def reconcile(features, results, manual=None, min_score=MIN_SCORE):
+    """Feature index per result row plus the reviewable mapping table.
+
+    ``features`` has ``ac_name``, ``District`` and optionally ``ac_no`` (one
+    row per boundary feature, in feature order); ``results`` has
+    ``Constituency`` and ``Const. No.``; ``manual`` is a previous mapping
+    table whose "manual" rows are applied first.
+    """
+    n_res   = len(results)
+    fid     = np.full(n_res, -1, dtype=np.int64)
+    method  = np.full(n_res, "unmatched", dtype=object)
+    score   = np.zeros(n_res)
+    f_key   = name_key(features["ac_name"]).to_numpy()
+    r_key   = name_key(results["Constituency"]).to_numpy()
+    r_no    = pd.to_numeric(results["Const. No."], errors="coerce").to_numpy()
+    taken   = np.zeros(len(features), dtype=bool)
+
+    def pair(rows, feats, how, scores=1.0):
+        fid[rows], method[rows], score[rows] = feats, how, scores
+        taken[feats] = True
+
+    if manual is not None and len(manual):
+        by_name = {n: i for i, n in enumerate(features["ac_name"])}
+        fixes   = manual[manual["method"] == "manual"]
+        fixes   = dict(zip(pd.to_numeric(fixes["const_no"], errors="coerce"), fixes["ac_name"]))
+        for r in range(n_res):
+            f = by_name.get(fixes.get(r_no[r]), -1)
+            if f >= 0 and not taken[f]:
+                pair(r, f, "manual")
+
+    if "ac_no" in features:
+        f_no = pd.to_numeric(features["ac_no"], errors="coerce")
+        pos  = {int(n): i for i, n in enumerate(f_no) if pd.notna(n)}
+        for r in np.flatnonzero(fid < 0):
+            f = pos.get(int(r_no[r]), -1) if not np.isnan(r_no[r]) else -1
+            if f >= 0 and not taken[f]:
+                pair(r, f, "number")
+
+    pos = {}
+    for i, k in enumerate(f_key):
+        pos.setdefault(k, i)
+    for r in np.flatnonzero(fid < 0):
+        f = pos.get(r_key[r], -1)
+        if f >= 0 and not taken[f]:
+            pair(r, f, "exact")
+
+    free = np.flatnonzero(~taken)
+    todo = np.flatnonzero(fid < 0)
+    if len(free) and len(todo):
+        index = NameIndex(f_key[free])
+        props = sorted(((s, r, free[i]) for r in todo for s, i in index.best(r_key[r])
+                        if s >= min_score), reverse=True)
+        for s, r, f in props:
+            if fid[r] < 0 and not taken[f]:
+                pair(r, f, "fuzzy", round(s, 3))
+
+    table = pd.DataFrame({
+        "const_no":     results["Const. No."].to_numpy(),
+        "constituency": results["Constituency"].to_numpy(),
+        "ac_name":      np.where(fid >= 0, features["ac_name"].to_numpy()[fid], None),
+        "dist_name":    np.where(fid >= 0, features["District"].to_numpy()[fid], None),
+        "method":       method,
+        "score":        score,
+    }, columns=COLUMNS)
+    return fid, table
+
+
+def read_mapping(path):
+    try:
+        return pd.read_csv(path)
+    except (OSError, ValueError):
+        return None
+
+
+def merge_mapping(old, table):
+    """``table`` merged into a previous mapping, keyed by const_no.
+
+    Rows of ``old`` that ``table`` doesn't cover (other elections) are kept,
+    and so are its "manual" rows, even where the override could not apply.
+    """
+    if old is None or not len(old):
+        return table
+    old  = old.reindex(columns=COLUMNS)
+    keep = old["method"].eq("manual") | ~old["const_no"].isin(table["const_no"])
+    new  = table[~table["const_no"].isin(old.loc[keep, "const_no"])]
+    out  = pd.concat([old[keep], new], ignore_index=True)
+    return out.sort_values("const_no", kind="stable", ignore_index=True)
+
+
+def write_mapping(path, table):
+    """Write the mapping CSV if it changed; read-only deployments skip it."""
+    text = table.to_csv(index=False)
+    try:
+        if Path(path).read_text() == text:
+            return
+    except OSError:
+        pass
+    try:
+        with atomic_path(path) as tmp:
+            tmp.write_text(text)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Refresh the KML ↔ results mapping CSV.")
+    ap.add_argument("--csv", help="results CSV path or URL (default: the GitHub CSV)")
+    ap.add_argument("--year", type=int, help="a stored election instead of the CSV")
+    ap.add_argument("--election", default="general")
+    args = ap.parse_args()
+
+    app     = import_app()
+    geojson = app.load_geojson()
+    results = app.load_election(args.year, args.election) if args.year \
+              else app.load_data(args.csv or app.CSV_URL)
+    old     = read_mapping(app.AC_MAPPING)
+    _, table = reconcile(app.feature_table(geojson, geojson.get("sha256")), results, old)
+    write_mapping(app.AC_MAPPING, merge_mapping(old, table))
+    print(table["method"].value_counts().to_string(), f"\n-> {app.AC_MAPPING}")
@@ -0,0 +1,146 @@
+# ── Point → AC lookup ─────────────────────────────────────────────────────────
+# A packed STR-tree (Sort-Tile-Recursive R-tree) over the AC polygon bounding
+# boxes plus an even-odd point-in-polygon test on the full-resolution edges.
+# Both run on whole arrays of points: the tree is walked one level at a time
+# for every (point, node) pair, then every (point, candidate AC) pair is
+# expanded against the AC's edges in the point's horizontal band and the
+# crossings are counted in one pass.  Holes and multi-part ACs fall out of the
+# even-odd rule, since every ring's edges are tested together.
+import numpy as np
+
+from boundaries import _polygons
+
+NODE_SIZE = 16
+BANDS     = 64          # horizontal edge strips per AC
+_CHUNK    = 1 << 20     # point × edge cells per point-in-polygon batch
+
+
+def _str_order(boxes, m):
+    # STR packing: sort by centre x into vertical slabs of ~sqrt(n/m) nodes,
+    # then by centre y within each slab.
+    n      = len(boxes)
+    cx     = (boxes[:, 0] + boxes[:, 2]) / 2
+    cy     = (boxes[:, 1] + boxes[:, 3]) / 2
+    slabs  = int(np.ceil(np.sqrt(np.ceil(n / m))))
+    per    = slabs * m
+    by_x   = np.argsort(cx, kind="stable")
+    slab   = np.empty(n, dtype=np.int64)
+    slab[by_x] = np.arange(n) // per
+    return np.lexsort((cy, slab))
+
+
+def _pack(boxes, m):
+    # union box of every run of m consecutive entries
+    n   = len(boxes)
+    idx = np.arange(0, n, m)
+    return np.column_stack([np.minimum.reduceat(boxes[:, 0], idx),
+                            np.minimum.reduceat(boxes[:, 1], idx),
+                            np.maximum.reduceat(boxes[:, 2], idx),
+                            np.maximum.reduceat(boxes[:, 3], idx)])
+
+
+class ACIndex:
+    """Spatial index over a FeatureCollection from ``load_geojson``.
+
+    ``locate(lat, lon)`` returns the index of the feature containing the point
+    and ``assign(lats, lons)`` does the same for arrays of points; points that
+    fall outside every AC get ``-1``.
+    """
+
+    def __init__(self, geojson, node_size=NODE_SIZE):
+        self.m = node_size
+        edges, boxes = [], []
+        for f in geojson["features"]:
+            rings = [np.asarray(r, dtype=np.float64)[:, :2] for pg in _polygons(f["geometry"]) for r in pg]
+            e = np.concatenate([np.hstack([r[:-1], r[1:]]) for r in rings if len(r) > 1])
+            edges.append(e[e[:, 1] != e[:, 3]])     # horizontal edges never cross the ray
+            pts = np.concatenate(rings)
+            boxes.append([*pts.min(axis=0), *pts.max(axis=0)])
+        boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+        e = np.concatenate(edges) if edges else np.empty((0, 4))
+        e = np.column_stack([e[:, 0], e[:, 1], e[:, 3],
+                             (e[:, 2] - e[:, 0]) / (e[:, 3] - e[:, 1])])    # x0 y0 y1 dx/dy
+        # Each AC's box is cut into BANDS horizontal strips; an edge is listed
+        # under every strip it spans.  _ptr holds CSR offsets into _edges for
+        # strip (feature * BANDS + band).
+        self._y0 = boxes[:, 1]
+        self._h  = np.where(boxes[:, 3] > boxes[:, 1], (boxes[:, 3] - boxes[:, 1]) / BANDS, 1.0)
+        banded, sizes, start = [], [], 0
+        for i, n in enumerate(map(len, edges)):
+            be, count = _banded(e[start:start + n], self._y0[i], self._h[i])
+            banded.append(be)
+            sizes.append(count)
+            start += n
+        self._edges = np.concatenate(banded) if banded else np.empty((0, 4))
+        self._ptr   = np.concatenate([[0], np.cumsum(np.concatenate(sizes) if sizes else [])]).astype(np.int64)
+
+        # levels[0] holds one box per feature in STR order; node j of level
+        # k+1 covers entries j*m .. j*m+m-1 of level k.  Upper levels keep the
+        # slab-major order of the leaves, which is already spatially coherent.
+        order = _str_order(boxes, self.m) if len(boxes) else np.empty(0, dtype=np.int64)
+        self._leaf_ids = order
+        self._levels   = [boxes[order]]
+        while len(self._levels[-1]) > self.m:
+            self._levels.append(_pack(self._levels[-1], self.m))
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+    def candidates(self, x, y):
+        """``(point, feature)`` index pairs whose bounding boxes contain the point."""
+        top   = self._levels[-1]
+        pts   = np.repeat(np.arange(len(x)), len(top))
+        nodes = np.tile(np.arange(len(top)), len(x))
+        for k in range(len(self._levels) - 1, -1, -1):
+            b    = self._levels[k][nodes]
+            keep = (b[:, 0] <= x[pts]) & (x[pts] <= b[:, 2]) & (b[:, 1] <= y[pts]) & (y[pts] <= b[:, 3])
+            pts, nodes = pts[keep], nodes[keep]
+            if k == 0:
+                break
+            n_child = len(self._levels[k - 1])
+            pts     = np.repeat(pts, self.m)
+            nodes   = (np.repeat(nodes, self.m) * self.m + np.tile(np.arange(self.m), len(nodes)))
+            valid   = nodes < n_child
+            pts, nodes = pts[valid], nodes[valid]
+        return pts, self._leaf_ids[nodes]
+
+    def assign(self, lat, lon):
+        """Feature index per point (``-1`` outside every AC)."""
+        y   = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        x   = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        out = np.full(len(x), -1, dtype=np.int64)
+        pts, feats = self.candidates(x, y)
+        if not len(pts):
+            return out
+        band  = np.clip(((y[pts] - self._y0[feats]) / self._h[feats]).astype(np.int64), 0, BANDS - 1)
+        strip = feats * BANDS + band
+        start = self._ptr[strip]
+        size  = self._ptr[strip + 1] - start
+        # highest feature first, so on overlaps the lowest index is written last
+        order = np.argsort(-feats, kind="stable")
+        pts, feats, start, size = pts[order], feats[order], start[order], size[order]
+        step = max(1, len(pts) * _CHUNK // max(int(size.sum()), 1))
+        for lo in range(0, len(pts), step):
+            hi     = min(lo + step, len(pts))
+            n      = size[lo:hi]
+            pair   = np.repeat(np.arange(hi - lo), n)
+            edge   = np.repeat(start[lo:hi] - (np.cumsum(n) - n), n) + np.arange(n.sum())
+            e      = self._edges[edge]
+            px, py = x[pts[lo:hi]][pair], y[pts[lo:hi]][pair]
+            cross  = ((e[:, 1] > py) != (e[:, 2] > py)) & (px < e[:, 0] + (py - e[:, 1]) * e[:, 3])
+            inside = np.bincount(pair, weights=cross, minlength=hi - lo) % 2 == 1
+            out[pts[lo:hi][inside]] = feats[lo:hi][inside]
+        return out
+
+    def locate(self, lat, lon):
+        """Feature index containing (lat, lon), or ``-1``."""
+        return int(self.assign(lat, lon)[0])
+
+
+def _banded(e, y0, h, bands=BANDS):
+    # (edges ordered by band, edge count per band)
+    lo    = np.clip(((np.minimum(e[:, 1], e[:, 2]) - y0) / h).astype(np.int64), 0, bands - 1)
+    hi    = np.clip(((np.maximum(e[:, 1], e[:, 2]) - y0) / h).astype(np.int64), 0, bands - 1)
+    count = hi - lo + 1
+    ids   = np.repeat(np.arange(len(e)), count)
+    band  = np.repeat(lo, count) + np.arange(len(ids)) - np.repeat(np.cumsum(count) - count, count)
+    order = np.argsort(band, kind="stable")
+    return e[ids[order]], np.bincount(band, minlength=bands)
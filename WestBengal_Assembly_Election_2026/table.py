@@ -0,0 +1,137 @@
+# ── Results table engine ──────────────────────────────────────────────────────
+# Serves one page of a results frame at a time.  The frame is held once; sort
+# orders are row-index arrays computed the first time a (column, direction) is
+# asked for, and filter masks are boolean arrays cached per filter value and
+# per filter combination.  A page is then a mask lookup on the presorted order
+# and an ``iloc`` of ``size`` rows, so only the visible rows are ever copied,
+# whatever the size of the frame.  ``presort`` / ``prefilter`` build the orders
+# and per-value masks the first page needs when the table is created, so that
+# cost is paid once per data version rather than on a viewer's first rerun.
+# One instance is shared by every session, so the caches are only touched
+# under a lock, and both the mask and the view caches are bounded LRUs.
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+PAGE_SIZE = 50
+MAX_VIEWS = 64      # filtered sort orders kept
+MAX_MASKS = 256     # filter masks kept (per value and per combination)
+
+
+class ResultsTable:
+    """Sorted, filtered, paged view over ``df[columns]``.
+
+    Filters are ``{column: value}`` dicts; ``None`` or a missing column means
+    no filter, a list or tuple means "any of", and a ``("not", values)`` pair
+    means "none of".  Missing values sort last in both directions and ties
+    keep frame order.
+    """
+
+    def __init__(self, df, columns=None, presort=(), prefilter=()):
+        self.frame   = (df if columns is None else df[list(columns)]).reset_index(drop=True)
+        self._orders = {}               # (column, ascending) → row indices
+        self._masks  = OrderedDict()    # (column, value) → bool array
+        self._views  = OrderedDict()    # (filters, column, ascending) → row indices
+        self._lock   = threading.RLock()
+        for column, ascending in presort:
+            self.order(column, ascending)
+        for column in prefilter:
+            self._value_masks(column)
+
+    def __len__(self):
+        return len(self.frame)
+
+    # ── Building blocks ───────────────────────────────────────────────────────
+    def order(self, column, ascending=True):
+        key = (column, ascending)
+        with self._lock:
+            if key not in self._orders:
+                col = self.frame[column]
+                if pd.api.types.is_numeric_dtype(col) and not isinstance(col.dtype, pd.CategoricalDtype):
+                    rank = col.to_numpy(dtype=np.float64, na_value=np.nan)
+                    miss = np.isnan(rank)
+                    rank = np.where(miss, 0, rank)
+                else:
+                    # ordered categoricals rank by their categories, the rest alphabetically
+                    if isinstance(col.dtype, pd.CategoricalDtype) and col.cat.ordered:
+                        rank = col.cat.codes.to_numpy()
+                    else:
+                        rank = pd.factorize(col.astype(object), sort=True)[0]
+                    miss = rank < 0
+                rank = rank if ascending else -rank
+                self._orders[key] = np.lexsort((np.arange(len(col)), rank, miss))
+            return self._orders[key]
+
+    def _cache_mask(self, key, m):
+        # caller holds the lock
+        self._masks[key] = m
+        if len(self._masks) > MAX_MASKS:
+            self._masks.popitem(last=False)
+        return m
+
+    def _value_masks(self, column):
+        # one factorize pass → a mask per distinct value of ``column``
+        with self._lock:
+            codes, values = pd.factorize(self.frame[column])
+            for i, value in enumerate(values):
+                self._cache_mask((column, value), codes == i)
+
+    def _mask(self, column, value):
+        # caller holds the lock; "any of" / "none of" reuse the per-value masks
+        key = (column, value)
+        if key in self._masks:
+            self._masks.move_to_end(key)
+            return self._masks[key]
+        if isinstance(value, tuple) and value[:1] == ("not",):
+            m = ~self._mask(column, tuple(value[1]))
+        elif isinstance(value, tuple):
+            m = np.zeros(len(self.frame), dtype=bool)
+            for v in value:
+                m |= self._mask(column, v)
+        else:
+            m = (self.frame[column] == value).to_numpy(dtype=bool, na_value=False)
+        return self._cache_mask(key, m)
+
+    def mask(self, filters):
+        """Boolean row mask for a filter dict (cached per combination)."""
+        filters = _freeze(filters)
+        key     = ("mask", filters)
+        with self._lock:
+            if key in self._masks:
+                self._masks.move_to_end(key)
+                return self._masks[key]
+            m = np.ones(len(self.frame), dtype=bool)
+            for column, value in filters:
+                m &= self._mask(column, value)
+            return self._cache_mask(key, m)
+
+    def rows(self, filters=None, sort=None, ascending=True):
+        """Row indices passing ``filters`` in sort order."""
+        key = (_freeze(filters), sort, ascending)
+        with self._lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                return self._views[key]
+            order = self.order(sort, ascending) if sort else np.arange(len(self.frame))
+            rows  = order[self.mask(filters)[order]]
+            self._views[key] = rows
+            if len(self._views) > MAX_VIEWS:
+                self._views.popitem(last=False)
+            return rows
+
+    # ── Pages ─────────────────────────────────────────────────────────────────
+    def count(self, filters=None):
+        return int(self.mask(filters).sum())
+
+    def page(self, filters=None, sort=None, ascending=True, page=0, size=PAGE_SIZE):
+        """``(rows of page ``page`` (0-based) as a DataFrame, matching row count)``."""
+        rows = self.rows(filters, sort, ascending)
+        return self.frame.iloc[rows[page * size:(page + 1) * size]], len(rows)
+
+
+def _freeze(filters):
+    if not filters:
+        return ()
+    return tuple(sorted((c, tuple(v) if isinstance(v, list) else v)
+                        for c, v in dict(filters).items() if v is not None))
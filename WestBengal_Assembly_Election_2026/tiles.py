@@ -0,0 +1,247 @@
+# ── Vector tiles ──────────────────────────────────────────────────────────────
+# Cuts the AC boundaries into Mapbox Vector Tiles (a single "acs" layer) for
+# the map's zoom range and packs them, gzipped, into one archive file.  A small
+# threaded HTTP endpoint serves the tiles with immutable cache headers; the
+# archive hash is part of the URL, so a boundary change never hits a stale
+# browser cache.  Results are not in the tiles — the page colours them from a
+# small per-AC attribute table (see build_map).
+#
+#   python tiles.py wb_acs_map.bin [wb_acs_map.tiles]
+import os, re, json, gzip, mmap, hashlib, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+
+from boundaries import read_cache, _polygons
+from util import atomic_path
+
+EXTENT = 4096
+BUFFER = 64
+LAYER  = "acs"
+DEFAULT_ZOOMS = range(7, 13)   # app.MIN_ZOOM..MAX_ZOOM
+
+
+# ── Protobuf / MVT encoding ───────────────────────────────────────────────────
+def _varint(n):
+    out = bytearray()
+    while n > 0x7F:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _msg(field, data):
+    return _varint(field << 3 | 2) + _varint(len(data)) + data
+
+
+def _uint(field, n):
+    return _varint(field << 3) + _varint(n)
+
+
+def _packed(field, ints):
+    return _msg(field, b"".join(map(_varint, ints)))
+
+
+def _geometry_commands(rings):
+    # MoveTo / LineTo(n) / ClosePath per ring, zig-zag encoded deltas; the
+    # cursor carries over from one ring to the next within a feature.
+    cmds, cursor = [], np.zeros(2, dtype=np.int64)
+    for r in rings:
+        d = np.diff(np.vstack([cursor, r]), axis=0)
+        z = ((d << 1) ^ (d >> 63)).tolist()
+        cmds += [1 | 1 << 3, *z[0], 2 | (len(z) - 1) << 3]
+        cmds += [v for p in z[1:] for v in p]
+        cmds.append(7 | 1 << 3)
+        cursor = r[-1]
+    return cmds
+
+
+def _area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)) / 2
+
+
+def _clip(ring, lo, hi):
+    # Sutherland–Hodgman against the buffered tile square, one axis side at a
+    # time; every edge is handled in a single vectorised pass.
+    for axis, bound, keep_lo in ((0, lo, True), (0, hi, False), (1, lo, True), (1, hi, False)):
+        if len(ring) == 0:
+            return ring
+        cur, nxt = ring, np.roll(ring, -1, axis=0)
+        a_in = cur[:, axis] >= bound if keep_lo else cur[:, axis] <= bound
+        b_in = nxt[:, axis] >= bound if keep_lo else nxt[:, axis] <= bound
+        span = nxt[:, axis] - cur[:, axis]
+        t    = np.divide(bound - cur[:, axis], span, out=np.zeros(len(cur)), where=span != 0)
+        cross = cur + (nxt - cur) * t[:, None]
+        out  = np.stack([cross, nxt], axis=1)
+        mask = np.stack([a_in != b_in, b_in], axis=1)
+        ring = out[mask]
+    return ring
+
+
+def _encode_tile(features):
+    keys, values, vindex, body = ["ac", "dist"], [], {}, b""
+    for fid, props, rings in features:
+        tags = []
+        for k, key in enumerate(keys):
+            v = str(props.get(key, ""))
+            if v not in vindex:
+                vindex[v] = len(values)
+                values.append(v)
+            tags += (k, vindex[v])
+        geom = _geometry_commands(rings)
+        body += _msg(2, _uint(1, fid) + _packed(2, tags) + _uint(3, 3) + _packed(4, geom))
+    layer = (_uint(15, 2) + _msg(1, LAYER.encode()) + body
+             + b"".join(_msg(3, k.encode()) for k in keys)
+             + b"".join(_msg(4, _msg(1, v.encode())) for v in values)
+             + _uint(5, EXTENT))
+    return _msg(3, layer)
+
+
+# ── Tiling ────────────────────────────────────────────────────────────────────
+def _project(coords, z):
+    # lon/lat → global tile-pixel coordinates at zoom z (Web Mercator)
+    lon, lat = coords[:, 0], np.radians(coords[:, 1])
+    scale = EXTENT * 2 ** z
+    x = (lon + 180) / 360 * scale
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * scale
+    return np.column_stack([x, y])
+
+
+def cut_tiles(geojson, zooms):
+    """Yield ``(z, x, y, mvt_bytes)`` for every non-empty tile.
+
+    ``geojson`` is a collection from ``load_geojson``; its simplified level for
+    a zoom is used when present, the full rings otherwise.
+    """
+    features = geojson["features"]
+    for z in zooms:
+        shapes = geojson.get("levels", {}).get(z) or [f["geometry"] for f in features]
+        tiles  = {}
+        for fid, (f, g) in enumerate(zip(features, shapes)):
+            props = {"ac": f["properties"].get("ac_name", ""),
+                     "dist": f["properties"].get("dist_name", "")}
+            polys = [[_project(np.asarray(r, dtype=np.float64), z) for r in pg]
+                     for pg in _polygons(g)]
+            allpts = np.concatenate([pg[0] for pg in polys])
+            (x0, y0), (x1, y1) = allpts.min(axis=0), allpts.max(axis=0)
+            for tx in range(int((x0 - BUFFER) // EXTENT), int((x1 + BUFFER) // EXTENT) + 1):
+                for ty in range(int((y0 - BUFFER) // EXTENT), int((y1 + BUFFER) // EXTENT) + 1):
+                    off, rings = np.array([tx * EXTENT, ty * EXTENT]), []
+                    for pg in polys:
+                        for k, r in enumerate(pg):
+                            c = np.round(_clip(r[:-1] - off, -BUFFER, EXTENT + BUFFER)).astype(np.int64)
+                            if len(c):
+                                c = c[np.any(c != np.roll(c, 1, axis=0), axis=1)]
+                            if len(c) < 3 or _area(c) == 0:
+                                if k == 0:
+                                    break
+                                continue
+                            # exterior rings positive area (clockwise, y down)
+                            if (_area(c) > 0) != (k == 0):
+                                c = c[::-1]
+                            rings.append(c)
+                    if rings:
+                        tiles.setdefault((tx, ty), []).append((fid, props, rings))
+        for (x, y), feats in tiles.items():
+            yield z, x, y, _encode_tile(feats)
+
+
+# ── Archive ───────────────────────────────────────────────────────────────────
+# Layout: MAGIC | u64 header length | JSON header | gzipped tiles.
+# The header maps "z/x/y" to [offset, length] relative to the tile data.
+ARCHIVE_MAGIC = b"WBTIL\x00\x00\x01"
+
+
+def write_archive(path, geojson, zooms, **meta):
+    index, blobs, pos = {}, [], 0
+    for z, x, y, data in cut_tiles(geojson, zooms):
+        blob = gzip.compress(data, mtime=0)
+        index[f"{z}/{x}/{y}"] = [pos, len(blob)]
+        blobs.append(blob)
+        pos += len(blob)
+    digest = hashlib.sha256(b"".join(blobs)).hexdigest()[:12]
+    header = json.dumps(dict(meta, version=digest, zooms=list(zooms), tiles=index)).encode()
+    with atomic_path(path) as tmp, open(tmp, "wb") as fh:
+        fh.write(ARCHIVE_MAGIC)
+        fh.write(len(header).to_bytes(8, "little"))
+        fh.write(header)
+        for blob in blobs:
+            fh.write(blob)
+
+
+class TileArchive:
+    """Read-only, memory-mapped view of an archive written by write_archive."""
+
+    def __init__(self, path):
+        with open(path, "rb") as fh:
+            if fh.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+                raise ValueError("not a tile archive")
+            n = int.from_bytes(fh.read(8), "little")
+            self.meta  = json.loads(fh.read(n))
+            self._base = len(ARCHIVE_MAGIC) + 8 + n
+            self._mm   = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.version = self.meta["version"]
+
+    def get(self, z, x, y):
+        entry = self.meta["tiles"].get(f"{z}/{x}/{y}")
+        if entry is None:
+            return None
+        off, size = entry
+        return self._mm[self._base + off:self._base + off + size]
+
+
+def read_archive_meta(path):
+    try:
+        return TileArchive(path).meta
+    except (OSError, ValueError):
+        return None
+
+
+# ── Tile endpoint ─────────────────────────────────────────────────────────────
+_TILE_PATH = re.compile(r"^/tiles/(\w+)/(\d+)/(\d+)/(\d+)\.pbf$")
+
+
+def serve(archive, port, host="0.0.0.0"):
+    """Serve ``archive`` at ``/tiles/<version>/{z}/{x}/{y}.pbf`` from a daemon
+    thread and return the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            m = _TILE_PATH.match(self.path.split("?", 1)[0])
+            if not m or m.group(1) != archive.version:
+                self.send_error(404)
+                return
+            data = archive.get(*map(int, m.groups()[1:]))
+            self.send_response(200 if data else 204)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            if data:
+                self.send_header("Content-Type", "application/vnd.mapbox-vector-tile")
+                self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            if data:
+                self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import sys
+    src = sys.argv[1]
+    dst = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(src)[0] + ".tiles"
+    geojson = read_cache(src)
+    levels  = sorted(geojson.get("levels") or ())
+    # simplified levels plus one full-resolution zoom; a cache without levels
+    # is cut at full resolution over the dashboard's range
+    zooms   = levels + [levels[-1] + 1] if levels else list(DEFAULT_ZOOMS)
+    # app.tile_server reuses the archive only if it was cut from these boundaries
+    write_archive(dst, geojson, zooms, source=geojson.get("sha256"))
+    print(f"{len(TileArchive(dst).meta['tiles'])} tiles -> {dst} ({os.path.getsize(dst)/1e6:.1f} MB)")
@@ -0,0 +1,35 @@
+# ── Shared helpers ────────────────────────────────────────────────────────────
+# Atomic file replacement for every cache, archive and export the dashboard
+# writes, and the quiet ``import app`` the command-line tools use to reuse the
+# dashboard's own loaders outside ``streamlit run``.
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def atomic_path(path):
+    """Temporary sibling of ``path`` to write to.
+
+    It replaces ``path`` when the block exits cleanly and is removed when the
+    block raises, so readers see the old file or the new one, never half of
+    one.  The name starts with a dot (directory scans skip it) and carries the
+    pid and thread, so concurrent writers don't share a temporary file.
+    """
+    path = Path(path)
+    tmp  = path.parent / f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def import_app():
+    """The dashboard module, imported in bare mode (no ``streamlit run``)."""
+    import logging, warnings
+    logging.disable(logging.WARNING)    # bare-mode st.* notices on import
+    warnings.filterwarnings("ignore")   # folium's CartoDB API-key notice
+    import app
+    return app
@@ -0,0 +1,32 @@
+# Helpers shared by the Saraswati Pujo dashboard (sp26.py) and its ledger
+# (pujo_ledger.py): how the wide contributions sheet is laid out (a label
+# column plus one column per year), and atomic file replacement.  Kept in a
+# module of their own so the ledger never imports the dashboard and the
+# dashboard's sheet parsing doesn't live in the storage layer.
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+YEAR_RE = re.compile(r"^\d{4}$")
+
+
+def schema(df):
+    # Label column (Hostel, Pandal, ...) and the 4-digit year columns, oldest first
+    years = sorted((c for c in df.columns if YEAR_RE.match(str(c))), key=int)
+    label = "Hostel" if "Hostel" in df.columns else next((c for c in df.columns if c not in years), None)
+    return label, years
+
+
+@contextmanager
+def atomic_path(path):
+    """Temporary sibling of ``path`` to write to; it replaces ``path`` when the
+    block exits cleanly and is removed when the block raises."""
+    path = Path(path)
+    tmp  = path.parent / f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
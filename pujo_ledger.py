@@ -0,0 +1,150 @@
+# Append-only contributions ledger for the Saraswati Pujo dashboard (sp26.py).
+#
+# Every collection is one timestamped row in `entries`; rows are never
+# updated or deleted (a correction is a negative entry).  A trigger keeps
+# `totals` -- one row per (hostel, year) -- up to date on each insert, so the
+# dashboard reads O(hostels) rows instead of summing the log, and the log can
+# still be replayed to show how fast money came in.
+#
+#   python pujo_ledger.py import data.csv        # seed opening balances
+#   python pujo_ledger.py add H3 500 [--year 2026] [--note "cash, 2nd floor"]
+#   python pujo_ledger.py totals
+import os
+import time
+import sqlite3
+import argparse
+import threading
+import pandas as pd
+
+from pujo_common import schema
+
+LEDGER_PATH = os.environ.get("PUJO_LEDGER", "pujo_ledger.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts     REAL    NOT NULL,            -- unix seconds
+    hostel TEXT    NOT NULL,
+    year   INTEGER NOT NULL,
+    amount REAL    NOT NULL,
+    note   TEXT
+);
+CREATE TABLE IF NOT EXISTS totals (
+    hostel  TEXT    NOT NULL,
+    year    INTEGER NOT NULL,
+    amount  REAL    NOT NULL,
+    entries INTEGER NOT NULL,
+    PRIMARY KEY (hostel, year)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hostels (    -- display order: first appearance
+    hostel   TEXT PRIMARY KEY,
+    first_id INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS entries_total AFTER INSERT ON entries BEGIN
+    INSERT OR IGNORE INTO hostels VALUES (NEW.hostel, NEW.id);
+    INSERT INTO totals VALUES (NEW.hostel, NEW.year, NEW.amount, 1)
+    ON CONFLICT (hostel, year) DO UPDATE
+        SET amount = amount + excluded.amount, entries = entries + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_no_update BEFORE UPDATE ON entries BEGIN
+    SELECT RAISE(ABORT, 'ledger is append-only');
+END;
+CREATE TRIGGER IF NOT EXISTS entries_no_delete BEFORE DELETE ON entries BEGIN
+    SELECT RAISE(ABORT, 'ledger is append-only');
+END;
+"""
+
+
+class Ledger:
+    def __init__(self, path=LEDGER_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    # --- WRITING ---
+    def add(self, hostel, amount, year=None, ts=None, note=None):
+        return self.add_many([(hostel, amount, year, ts, note)])
+
+    def add_many(self, rows):
+        # rows of (hostel, amount, year, ts, note); year/ts default to now
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT INTO entries (ts, hostel, year, amount, note) VALUES (?, ?, ?, ?, ?)",
+                    [(ts or now, str(h), int(y or time.localtime(ts or now).tm_year), float(a), n)
+                     for h, a, y, ts, n in rows])
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            return self._db.execute("SELECT MAX(id) FROM entries").fetchone()[0]
+
+    def import_summary(self, df, note="opening balance"):
+        # Seed from the wide Hostel,2024,2025,... sheet: one entry per non-zero cell
+        label, years = schema(df)
+        long = df.melt(id_vars=label, value_vars=years, var_name="year", value_name="amount")
+        long["amount"] = pd.to_numeric(long["amount"], errors="coerce").fillna(0)
+        long = long[long["amount"] != 0]
+        return self.add_many(zip(long[label], long["amount"], long["year"].astype(int),
+                                 [None] * len(long), [note] * len(long)))
+
+    # --- READING ---
+    @property
+    def version(self):
+        # id of the newest entry; grows with every insert
+        return self._query("SELECT COALESCE(MAX(id), 0) FROM entries")[0][0]
+
+    def last_entry_time(self):
+        return self._query("SELECT MAX(ts) FROM entries")[0][0]
+
+    def changed_since(self, version):
+        return {h for (h,) in self._query("SELECT DISTINCT hostel FROM entries WHERE id > ?", (version,))}
+
+    def totals(self):
+        # Wide Hostel x year frame (year columns as strings, like data.csv)
+        rows = self._query("SELECT t.hostel, t.year, t.amount FROM totals t "
+                           "JOIN hostels h USING (hostel) ORDER BY h.first_id")
+        long = pd.DataFrame(rows, columns=["Hostel", "year", "amount"])
+        wide = long.pivot(index="Hostel", columns="year", values="amount").fillna(0)
+        wide = wide.reindex(index=long["Hostel"].unique(), columns=sorted(wide.columns))
+        wide.columns = wide.columns.astype(str)
+        return wide.reset_index().rename_axis(columns=None)
+
+    def velocity(self, year, freq="D"):
+        # Replay of the log: amount collected per period and running total
+        rows = self._query("SELECT ts, amount FROM entries WHERE year = ? ORDER BY id", (int(year),))
+        log = pd.DataFrame(rows, columns=["ts", "amount"])
+        log["ts"] = pd.to_datetime(log["ts"], unit="s")
+        per = log.set_index("ts")["amount"].resample(freq).sum()
+        return pd.DataFrame({"collected": per, "running total": per.cumsum()})
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Pujo contributions ledger")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    add = sub.add_parser("add")
+    add.add_argument("hostel")
+    add.add_argument("amount", type=float)
+    add.add_argument("--year", type=int)
+    add.add_argument("--note")
+    imp = sub.add_parser("import")
+    imp.add_argument("csv")
+    sub.add_parser("totals")
+    args = ap.parse_args()
+
+    ledger = Ledger()
+    if args.cmd == "add":
+        print(f"entry {ledger.add(args.hostel, args.amount, args.year, note=args.note)}")
+    elif args.cmd == "import":
+        # data.csv layout: "Last Updated" line, then the Hostel,2024,... header
+        print(f"up to entry {ledger.import_summary(pd.read_csv(args.csv, header=1))}")
+    else:
+        print(ledger.totals().to_string(index=False))
@@ -1,6 +1,16 @@
+import io
+import os
+import hashlib
+import time
+import pickle
+import threading
+import requests
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from pujo_ledger import Ledger, LEDGER_PATH
+from pujo_common import atomic_path, schema
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -35,16 +45,16 @@ st.markdown("""
     }
     div[data-testid="stMetric"]:hover { transform: translateY(-5px); }
 
-    /* Card Colors */
-    div[data-testid="column"]:nth-of-type(1) div[data-testid="stMetric"] {
+    /* Card Colors (counted from the right: current year, previous, older) */
+    div[data-testid="column"] div[data-testid="stMetric"] {
         background: linear-gradient(135deg, rgba(45, 212, 191, 0.15), rgba(45, 212, 191, 0.05));
         border-left: 5px solid rgba(45, 212, 191, 0.5);
     }
-    div[data-testid="column"]:nth-of-type(2) div[data-testid="stMetric"] {
+    div[data-testid="column"]:nth-last-of-type(2) div[data-testid="stMetric"] {
         background: linear-gradient(135deg, rgba(167, 139, 250, 0.15), rgba(167, 139, 250, 0.05));
         border-left: 5px solid rgba(167, 139, 250, 0.5);
     }
-    div[data-testid="column"]:nth-of-type(3) div[data-testid="stMetric"] {
+    div[data-testid="column"]:nth-last-of-type(1) div[data-testid="stMetric"] {
         background: linear-gradient(135deg, rgba(251, 146, 60, 0.15), rgba(251, 146, 60, 0.05));
         border-left: 5px solid rgba(251, 146, 60, 0.5);
     }
@@ -81,31 +91,310 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # --- 1. DATA LOADING FUNCTION (LIVE RAW GITHUB) ---
-@st.cache_data(ttl=60) # Auto-refresh cache every 60 seconds
+# LINK TO RAW DATA
+# If your branch is 'main', change 'master' to 'main' below
+CSV_URL = "https://raw.githubusercontent.com/somdeepkundu/test_git/master/data.csv"
+def parse_csv(content):
+    # Row 0 is the date (metadata), row 1 the header, the rest the data
+    # (read with the CSV parser: a quoted date cell may contain a comma)
+    buf = io.BytesIO(content)
+    raw_text = str(pd.read_csv(buf, header=None, nrows=1).iloc[0, 0])
+    update_date = raw_text.replace("Last Updated:", "").strip() if "Last Updated" in raw_text else raw_text
+
+    buf.seek(0)
+    df = pd.read_csv(buf, header=1)
+
+    # Ensure numbers are treated as numbers: every year column in one pass
+    _, years = schema(df)
+    if years:
+        block = pd.to_numeric(df[years].to_numpy().ravel(), errors='coerce')
+        df[years] = np.nan_to_num(block.reshape(len(df), len(years)))
+
+    return update_date, df
+
+# --- UPDATE BROKER ---
+# One background thread per process owns the upstream fetch (conditional GET,
+# so an unchanged file costs a 304) and publishes each new snapshot with a
+# version number and the hostels that changed.  Sessions never hit GitHub
+# themselves: a small fragment compares the broker's version with the one it
+# rendered and reruns the page when it moved, so upstream traffic does not
+# grow with the number of viewers.
+#
+# Stale-while-revalidate: the last good snapshot (parsed frame, date line and
+# validators) is saved to SNAPSHOT_PATH and loaded when the process starts, so
+# pages are served from it at once and never wait on GitHub; the thread
+# revalidates in the background.  Only a first start with nothing saved
+# waits for the initial download.
+POLL_SECONDS  = 10  # upstream checks, shared by all sessions
+WATCH_SECONDS = 2   # how often each open page looks at the broker (in-process)
+FETCH_TIMEOUT = 15
+SNAPSHOT_PATH = os.environ.get("PUJO_SNAPSHOT", ".sp26_snapshot.pkl")
+BROKER_THREAD = "sp26-update-broker"
+
+class UpdateBroker:
+    def __init__(self, url, interval=POLL_SECONDS, snapshot_path=SNAPSHOT_PATH):
+        self.url = url
+        self.interval = interval
+        self.snapshot_path = snapshot_path
+        self.etag = self.modified = None
+        self.snapshot = None     # (update_date, df); never mutated once published
+        self.version = 0
+        self.changes = []        # [(version, hostels changed to reach it)]
+        self.error = None
+        self.checked = None      # last upstream answer of any kind
+        self.validated = None    # last time upstream confirmed the snapshot (200/304)
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._restore()
+        thread = threading.Thread(target=self._run, daemon=True, name=BROKER_THREAD)
+        thread.broker = self
+        thread.start()
+
+    def _restore(self):
+        try:
+            with open(self.snapshot_path, "rb") as fh:
+                saved = pickle.load(fh)
+            snapshot = (saved["update_date"], saved["df"])
+        except Exception:
+            return  # nothing saved yet, or unreadable: fetch as usual
+        self.etag, self.modified = saved.get("etag"), saved.get("modified")
+        self.validated = saved.get("validated")
+        self._publish(snapshot)
+        self.ready.set()
+
+    def _persist(self):
+        saved = {"update_date": self.snapshot[0], "df": self.snapshot[1], "etag": self.etag,
+                 "modified": self.modified, "validated": self.validated}
+        try:
+            with atomic_path(self.snapshot_path) as tmp, open(tmp, "wb") as fh:
+                pickle.dump(saved, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass  # read-only deployment: keep the in-memory snapshot only
+
+    def fetch(self):
+        with self._lock:
+            headers = {}
+            if self.snapshot is not None:
+                if self.etag:
+                    headers["If-None-Match"] = self.etag
+                if self.modified:
+                    headers["If-Modified-Since"] = self.modified
+            try:
+                r = requests.get(self.url, headers=headers, timeout=FETCH_TIMEOUT)
+                self.checked = time.time()
+                if r.status_code == 304 and self.snapshot is not None:
+                    self.validated, self.error = self.checked, None
+                    return  # unchanged: no download, no re-parse
+                r.raise_for_status()
+                snapshot = parse_csv(r.content)
+                self.etag, self.modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+                self.validated, self.error = self.checked, None
+                self._publish(snapshot)
+                self._persist()
+            except Exception as e:
+                self.error = str(e)
+            finally:
+                self.ready.set()
+
+    def _publish(self, snapshot):
+        label = schema(snapshot[1])[0]
+        new = snapshot[1].set_index(label)
+        if self.snapshot is None:
+            changed = set(new.index)
+        else:
+            old = self.snapshot[1]
+            old = old.set_index(schema(old)[0])
+            if snapshot[0] == self.snapshot[0] and new.equals(old):
+                return
+            both = new.index.intersection(old.index)
+            moved = (new.loc[both] != old.loc[both].reindex(columns=new.columns)).any(axis=1)
+            changed = set(both[moved.to_numpy()]) | set(new.index.symmetric_difference(old.index))
+        self.snapshot = snapshot
+        self.changes = (self.changes + [(self.version + 1, changed)])[-64:]
+        self.version += 1
+
+    def changed_since(self, version):
+        out = set()
+        for v, hostels in self.changes:
+            if v > version:
+                out |= hostels
+        return out
+
+    def refresh(self):
+        # Refresh button: check upstream now instead of at the next tick
+        self._wake.set()
+
+    def close(self):
+        # Stops the polling thread once any fetch in flight has finished
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.fetch()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+@st.cache_resource
+def broker():
+    # One poller per process: after the cache is cleared the old broker's
+    # thread would keep polling forever, so stop any that are still running
+    for thread in threading.enumerate():
+        if thread.name == BROKER_THREAD:
+            thread.broker.close()
+    return UpdateBroker(CSV_URL)
+
 def load_data_from_github():
-    # LINK TO RAW DATA
-    # If your branch is 'main', change 'master' to 'main' below
-    csv_url = "https://raw.githubusercontent.com/somdeepkundu/test_git/master/data.csv"
-    
+    b = broker()
+    if b.snapshot is None:
+        b.ready.wait(FETCH_TIMEOUT)  # first start with no saved snapshot
+    if b.snapshot is None:
+        # Return empty if failed so app doesn't crash completely
+        return f"Error: {b.error or 'timed out'}", pd.DataFrame()
+    return b.snapshot
+
+# --- CONTRIBUTIONS LEDGER ---
+# Once a ledger exists (see pujo_ledger.py) it is the source instead of the
+# CSV: totals come from its trigger-maintained table, its newest entry id is
+# the version the update watcher follows, and the log feeds the velocity chart.
+@st.cache_resource
+def open_ledger(path):
+    return Ledger(path)
+
+def ledger():
+    # checked on every call, so a ledger created while the app runs is picked up
+    return open_ledger(LEDGER_PATH) if os.path.exists(LEDGER_PATH) else None
+
+# --- EVENTS ---
+# Other festivals are CSVs in EVENTS_DIR laid out like data.csv (date line,
+# then <label>,<year>,<year>,...); the file name is the event name.  A file is
+# parsed once per modification time into a process-wide cache, however many
+# sessions have it open, and its mtime is the version the update watcher
+# follows, so rewriting the file reruns those pages.
+EVENTS_DIR = os.environ.get("PUJO_EVENTS", "events")
+LIVE_EVENT = "Saraswati Pujo 2026"  # the GitHub CSV / ledger above
+
+def event_files():
     try:
-        # A. Read just the first row to get the Date (Metadata)
-        meta_df = pd.read_csv(csv_url, header=None, nrows=1)
-        raw_text = str(meta_df.iloc[0, 0])
-        update_date = raw_text.replace("Last Updated:", "").strip() if "Last Updated" in raw_text else raw_text
+        names = sorted(f for f in os.listdir(EVENTS_DIR) if f.lower().endswith(".csv"))
+    except OSError:
+        return {}
+    return {os.path.splitext(f)[0].replace("_", " "): os.path.join(EVENTS_DIR, f) for f in names}
 
-        # B. Read the actual data (skip row 0 which is the date)
-        df = pd.read_csv(csv_url, header=1)
-        
-        # Ensure numbers are treated as numbers
-        cols_to_fix = ['2024', '2025', '2026']
-        for col in cols_to_fix:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-            
-        return update_date, df
-        
-    except Exception as e:
-        # Return empty if failed so app doesn't crash completely
-        return f"Error: {str(e)}", pd.DataFrame()
+@st.cache_resource(max_entries=32)
+def parse_event(path, mtime_ns):
+    with open(path, "rb") as fh:
+        return parse_csv(fh.read())
+
+class EventFile:
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def version(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def changed_since(self, version):
+        return set()
+
+    def load(self):
+        try:
+            return parse_event(self.path, self.version)
+        except Exception as e:
+            return f"Error: {e}", pd.DataFrame()
+
+def source(event=LIVE_EVENT):
+    path = event_files().get(event) if event != LIVE_EVENT else None
+    if path is not None:
+        return EventFile(path)
+    return ledger() or broker()
+
+def load_data(event=LIVE_EVENT):
+    src = source(event)
+    if isinstance(src, EventFile):
+        return src.load()
+    if not isinstance(src, Ledger):
+        return load_data_from_github()
+    ts = src.last_entry_time()
+    update_date = time.strftime("%d %b %Y, %H:%M", time.localtime(ts)) if ts else "No entries yet"
+    return update_date, src.totals()
+
+def age_text(seconds):
+    if seconds < 90:
+        return f"{seconds:.0f}s"
+    if seconds < 5400:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+@st.fragment(run_every=WATCH_SECONDS)
+def watch_updates(event, seen):
+    # Runs on its own every few seconds; a new source version reruns the page
+    src = source(event)
+    if src.version != seen:
+        st.session_state["changed_hostels"] = sorted(src.changed_since(seen))
+        st.rerun()
+    if getattr(src, "validated", None):
+        st.caption(f"● Live · snapshot age {age_text(time.time() - src.validated)}")
+    if getattr(src, "error", None) and src.snapshot is not None:
+        st.caption("⚠️ GitHub unreachable, showing the saved snapshot")
+
+# --- CHART BUILDER ---
+# The figure depends only on the frame, so it is built once per content hash
+# and shared (st.plotly_chart copies it before serialising, never mutates it);
+# reruns from unrelated widgets skip building the traces and labels.
+def frame_hash(df):
+    h = hashlib.sha256(",".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()[:16]
+
+@st.cache_resource(max_entries=8)
+def trends_figure(_df, version):
+    df = _df
+    label, years = schema(df)
+    fig = go.Figure()
+
+    # Older years
+    for year in years[:-2]:
+        fig.add_trace(go.Bar(
+            x=df[label], y=df[year], name=year,
+            marker_color='#455A64', opacity=0.3
+        ))
+
+    # Previous year
+    if len(years) > 1:
+        fig.add_trace(go.Bar(
+            x=df[label], y=df[years[-2]], name=years[-2],
+            marker_color='#7E57C2', opacity=0.6
+        ))
+
+    # Current year
+    if years:
+        current = df[years[-1]]
+        fig.add_trace(go.Bar(
+            x=df[label], y=current, name=years[-1],
+            marker_color='#FF8F00',
+            text=np.where(current > 0, np.char.mod("₹%.1fk", current.to_numpy() / 1000), ""),
+            textposition='outside'
+        ))
+
+    fig.update_layout(
+        barmode='group',
+        height=550,
+        margin=dict(t=20, b=30, l=10, r=10),
+        legend=dict(orientation="h", y=1.02, x=1, xanchor="right", bgcolor='rgba(0,0,0,0)', font=dict(color='#ccc')),
+        yaxis=dict(showgrid=True, gridcolor='rgba(255, 255, 255, 0.05)', zeroline=False, fixedrange=True),
+        xaxis=dict(showgrid=False, fixedrange=True),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Source Sans Pro", size=13)
+    )
+
+    return fig
 
 # --- 2. SIDEBAR ---
 with st.sidebar:
@@ -132,101 +421,101 @@ with st.sidebar:
     
     st.markdown("---")
     
+    # EVENT PICKER (only when EVENTS_DIR holds other events); ?event= in the URL selects one
+    events = [LIVE_EVENT, *(e for e in event_files() if e != LIVE_EVENT)]
+    event = LIVE_EVENT
+    if len(events) > 1:
+        asked = st.query_params.get("event")
+        event = st.selectbox("Event", events, index=events.index(asked) if asked in events else 0)
+        if event == LIVE_EVENT:
+            st.query_params.pop("event", None)
+        else:
+            st.query_params["event"] = event
+
     # REFRESH BUTTON
     if st.button("🔄 Refresh Data", type="primary", use_container_width=True):
-        st.cache_data.clear()
+        if not isinstance(source(event), (EventFile, Ledger)):
+            broker().refresh()  # wakes the broker; the watcher reruns when data moves
         st.rerun()
 
     # Load Data
-    last_updated_text, df = load_data_from_github()
+    src = source(event)
+    seen_version = src.version
+    last_updated_text, df = load_data(event)
     
     if not df.empty:
         st.success(f"📅 **Updated:** {last_updated_text}")
     else:
         st.error("Could not load data.")
         
-    st.caption("Data source: GitHub Raw")
+    if isinstance(src, EventFile):
+        st.caption(f"Data source: {os.path.basename(src.path)}")
+    else:
+        st.caption("Data source: Contributions ledger" if ledger() else "Data source: GitHub Raw")
+    watch_updates(event, seen_version)
+
+changed = st.session_state.pop("changed_hostels", None)
+if changed:
+    st.toast(f"Updated: {', '.join(map(str, changed[:8]))}" + (f" +{len(changed) - 8} more" if len(changed) > 8 else ""))
 
 # --- 3. MAIN DASHBOARD ---
 
-if not df.empty:
+label, years = schema(df)
+
+if not df.empty and years:
     
     # Title Section
     col_h1, col_h2 = st.columns([5, 2])
     with col_h1:
-        st.markdown('<div class="main-title">Saraswati Pujo 2026</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="main-title">{event}</div>', unsafe_allow_html=True)
     with col_h2:
         st.markdown("<br>", unsafe_allow_html=True)
         st.caption(f"IIT Bombay | {last_updated_text}")
         st.success("● System Online")
 
     # --- KPI CARDS ---
-    total_24 = df['2024'].sum()
-    total_25 = df['2025'].sum()
-    total_26 = df['2026'].sum()
-    growth = ((total_26 - total_25) / total_25) * 100 if total_25 > 0 else 0
-
-    k1, k2, k3 = st.columns(3)
+    # One card per year, newest MAX_CARDS; growth compares the last two
+    MAX_CARDS = 4
+    totals = df[years].sum()
+    shown = years[-MAX_CARDS:]
 
-    with k1: st.metric("HISTORICAL (2024)", f"₹{total_24:,.0f}")
-    with k2: st.metric("PREVIOUS (2025)", f"₹{total_25:,.0f}")
-    with k3: st.metric("CURRENT (2026)", f"₹{total_26:,.0f}", f"{growth:.1f}% vs 2025")
+    for card, year in zip(st.columns(len(shown)), shown):
+        age = len(years) - 1 - years.index(year)
+        name = "CURRENT" if age == 0 else "PREVIOUS" if age == 1 else "HISTORICAL"
+        delta = None
+        if age == 0 and len(years) > 1:
+            prev = totals[years[-2]]
+            growth = ((totals[year] - prev) / prev) * 100 if prev > 0 else 0
+            delta = f"{growth:.1f}% vs {years[-2]}"
+        with card: st.metric(f"{name} ({year})", f"₹{totals[year]:,.0f}", delta)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
     # --- CHART ---
     st.markdown("### 📊 Collection Trends")
 
-    fig = go.Figure()
-
-    # 2024
-    fig.add_trace(go.Bar(
-        x=df['Hostel'], y=df['2024'], name='2024',
-        marker_color='#455A64', opacity=0.3
-    ))
-
-    # 2025
-    fig.add_trace(go.Bar(
-        x=df['Hostel'], y=df['2025'], name='2025',
-        marker_color='#7E57C2', opacity=0.6
-    ))
-
-    # 2026
-    fig.add_trace(go.Bar(
-        x=df['Hostel'], y=df['2026'], name='2026',
-        marker_color='#FF8F00',
-        text=df['2026'].apply(lambda x: f"₹{x/1000:.1f}k" if x > 0 else ""),
-        textposition='outside'
-    ))
-
-    fig.update_layout(
-        barmode='group',
-        height=550,
-        margin=dict(t=20, b=30, l=10, r=10),
-        legend=dict(orientation="h", y=1.02, x=1, xanchor="right", bgcolor='rgba(0,0,0,0)', font=dict(color='#ccc')),
-        yaxis=dict(showgrid=True, gridcolor='rgba(255, 255, 255, 0.05)', zeroline=False, fixedrange=True),
-        xaxis=dict(showgrid=False, fixedrange=True),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="Source Sans Pro", size=13)
-    )
+    fig = trends_figure(df, frame_hash(df))
 
     st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
 
+    # --- VELOCITY (ledger only) ---
+    if isinstance(src, Ledger):
+        with st.expander(f"📈 Collection Velocity ({years[-1]})", expanded=False):
+            st.line_chart(src.velocity(years[-1]), height=300)
+
     # --- TABLE ---
     with st.expander("📝 Detailed Breakdown", expanded=False):
         st.dataframe(
-            df.set_index('Hostel'),
+            df.set_index(label),
             use_container_width=True,
-            column_config={
-                "2024": st.column_config.NumberColumn(format="₹%d"),
-                "2025": st.column_config.NumberColumn(format="₹%d"),
-                "2026": st.column_config.NumberColumn(format="₹%d")
-            }
+            column_config={year: st.column_config.NumberColumn(format="₹%d") for year in years}
         )
 
 else:
-    st.warning("Please upload 'data.csv' to your GitHub repository to see the dashboard.")
+    if isinstance(src, EventFile):
+        st.warning(f"{os.path.basename(src.path)} has no year columns (e.g. 2025, 2026) or no rows.")
+    else:
+        st.warning("Please upload 'data.csv' to your GitHub repository to see the dashboard.")
 
 st.markdown("---")
 st.markdown("<div style='text-align: right; color: #666; font-size: 0.8rem; padding: 21px;'>Designed with ❤️, by Saraswati Puja 2026 Committee, IIT Powai.</div>", unsafe_allow_html=True)
@@ -1,6 +1,6 @@
+import re
 import streamlit as st
-import base64
-from pathlib import Path
+import assets
 
 st.set_page_config(
     page_title="Abstract Asteroids",
@@ -17,17 +17,15 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-ASSETS = Path(__file__).parent.parent / "abstract-asteroids" / "assets" / "graphics"
-
-def _b64(name: str) -> str:
-    data = (ASSETS / name).read_bytes()
-    return "data:image/svg+xml;base64," + base64.b64encode(data).decode()
-
-SHIP = _b64("spaceship_full.svg")
-AST1 = _b64("asteroid1.svg")
-AST2 = _b64("asteroid2.svg")
-SHOT = _b64("green_projectile.svg")
-EXPL = _b64("explosion.svg")
+# Sprite URLs, built once per process (see assets.py): hashed app/static files
+# when static serving is on and the build is current, else inline data URIs.
+@st.cache_resource
+def sprite_urls() -> tuple:
+    if st.get_option("server.enableStaticServing"):
+        built = assets.static_urls()
+        if built:
+            return built
+    return assets.source_hash(), assets.data_uris(assets.build())
 
 # Google Apps Script web app URL for the leaderboard (see apps_script.js).
 # Add it to Streamlit Cloud → Settings → Secrets as: APPS_SCRIPT_URL = "..."
@@ -727,14 +725,13 @@ _TEMPLATE = """
 </html>
 """
 
-html = (
-    _TEMPLATE
-    .replace("__SHIP__", SHIP)
-    .replace("__AST1__", AST1)
-    .replace("__AST2__", AST2)
-    .replace("__SHOT__", SHOT)
-    .replace("__EXPL__", EXPL)
-    .replace("__SCRIPT_URL__", SCRIPT_URL)
-)
+# Rendered once per (assets, leaderboard URL) and shared by every session;
+# reruns reuse the same string.
+@st.cache_resource(max_entries=4)
+def render_page(_urls: dict, version: str, script_url: str) -> str:
+    html = re.sub(r"__([A-Z0-9]+)__", lambda m: _urls.get(m.group(1), m.group()), _TEMPLATE)
+    return html.replace("__SCRIPT_URL__", script_url)
+
 
-st.components.v1.html(html, height=580, scrolling=False)
+version, urls = sprite_urls()
+st.components.v1.html(render_page(urls, version, SCRIPT_URL), height=580, scrolling=False)
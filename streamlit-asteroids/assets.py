@@ -0,0 +1,108 @@
+# ── Sprite assets ──────────────────────────────────────────────────────────────
+# The game's sprites are the SVGs in ../abstract-asteroids/assets/graphics.
+# They are minified and encoded once per process (app.py keeps the result in
+# st.cache_resource), and the page is rendered once per asset hash instead of
+# on every rerun.
+#
+# ``python assets.py`` additionally writes the minified files to static/ under
+# content-hashed names, with static/manifest.json.  When the app runs with
+# server.enableStaticServing and the manifest matches the sources, the page
+# points at app/static/<name>.<hash>.svg instead of inlining base64 data
+# URIs: the browser caches the sprites and each rerun ships only the page.
+# (Older Streamlit releases serve only a fixed list of file types from
+# static/ with their real MIME type; check that .svg comes back as
+# image/svg+xml before switching static serving on.)
+import base64
+import hashlib
+import json
+import re
+from pathlib import Path
+
+SOURCE = Path(__file__).parent.parent / "abstract-asteroids" / "assets" / "graphics"
+STATIC = Path(__file__).parent / "static"
+
+# template placeholder → source file
+SPRITES = {
+    "SHIP": "spaceship_full.svg",
+    "AST1": "asteroid1.svg",
+    "AST2": "asteroid2.svg",
+    "SHOT": "green_projectile.svg",
+}
+
+PRECISION = 3   # decimals kept in coordinates and gradient matrices
+
+
+def _round(m: re.Match) -> str:
+    s = f"{float(m.group()):.{PRECISION}f}".rstrip("0").rstrip(".")
+    return "0" if s in ("", "-0") else s
+
+
+def minify_svg(data: bytes) -> bytes:
+    """Drop comments, metadata, editor layer ids and whitespace; shorten long decimals."""
+    text = data.decode("utf-8")
+    text = re.sub(r"<\?xml.*?\?>|<!--.*?-->|<title>.*?</title>|<metadata\b.*?</metadata>",
+                  "", text, flags=re.S)
+    text = re.sub(r' id="&lt;[^"]*&gt;"', "", text)       # Illustrator's id="<Path>"
+    text = re.sub(r"-?\d*\.\d{%d,}" % (PRECISION + 1), _round, text)
+    if "<text" not in text:
+        text = re.sub(r">\s+<", "><", text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};:])\s*", r"\1", text)     # inside <style>
+    return text.strip().encode()
+
+
+def source_hash(source: Path = SOURCE) -> str:
+    h = hashlib.sha256()
+    for key, name in sorted(SPRITES.items()):
+        h.update(key.encode())
+        h.update((source / name).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def build(source: Path = SOURCE) -> dict:
+    """``{placeholder: minified SVG bytes}``."""
+    return {key: minify_svg((source / name).read_bytes()) for key, name in SPRITES.items()}
+
+
+def data_uris(sprites: dict) -> dict:
+    return {key: "data:image/svg+xml;base64," + base64.b64encode(svg).decode()
+            for key, svg in sprites.items()}
+
+
+# ── Static files ───────────────────────────────────────────────────────────────
+def write_static(out: Path = STATIC, source: Path = SOURCE) -> dict:
+    """Write hashed sprite files and the manifest; returns the manifest."""
+    out.mkdir(parents=True, exist_ok=True)
+    files = {}
+    for key, svg in build(source).items():
+        name = f"{Path(SPRITES[key]).stem}.{hashlib.sha256(svg).hexdigest()[:10]}.svg"
+        (out / name).write_bytes(svg)
+        files[key] = name
+    manifest = {"source": source_hash(source), "files": files}
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=1))
+    keep = {*files.values(), "manifest.json"}
+    for old in out.glob("*.svg"):
+        if old.name not in keep:
+            old.unlink()
+    return manifest
+
+
+def static_urls(out: Path = STATIC, source: Path = SOURCE):
+    """``(source hash, {placeholder: app/static URL})``, or ``None`` when the
+    static build is missing or older than the sources."""
+    try:
+        manifest = json.loads((out / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return None
+    if manifest.get("source") != source_hash(source) \
+            or set(manifest.get("files", {})) != set(SPRITES) \
+            or not all((out / f).is_file() for f in manifest["files"].values()):
+        return None
+    return manifest["source"], {key: f"app/static/{f}" for key, f in manifest["files"].items()}
+
+
+if __name__ == "__main__":
+    manifest = write_static()
+    for key, name in manifest["files"].items():
+        before = (SOURCE / SPRITES[key]).stat().st_size
+        print(f"{SPRITES[key]:22} {before:>7} → {(STATIC / name).stat().st_size:>7} bytes  {name}")